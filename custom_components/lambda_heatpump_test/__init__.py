@@ -1,20 +1,187 @@
-
 from __future__ import annotations
+from typing import Any, Dict, List, Set, Tuple
+import logging
+
+import voluptuous as vol
+
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.config_entries import ConfigEntry
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.storage import Store
+
+from .coordinator import LambdaCoordinator, entry_option
+from .derived import DerivedMetrics
+from .discovery import async_discover_modules
+from .gateway import DEFAULT_UNIT_PRIORITY, GatewayClient, async_get_gateway, async_release_gateway
+from .registers import NUMBERS, build_sensors, entry_modules
 
 DOMAIN = "lambda_heatpump_test"
-PLATFORMS = [Platform.SENSOR]
+PLATFORMS = [Platform.SENSOR, Platform.NUMBER]
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+SERVICE_REDISCOVER_MODULES = "rediscover_modules"
+SERVICE_WRITE_SETPOINT = "write_setpoint"
+DERIVED_STORAGE_VERSION = 1
+SNAPSHOT_STORAGE_VERSION = 1
+
+_LOGGER = logging.getLogger(__name__)
+
+def entry_device_info(entry: ConfigEntry) -> DeviceInfo:
+    ip_address = entry.data["ip_address"]
+    unit_id = entry.data.get("unit_id", 1)
+    # further units behind the same gateway get their own device
+    device_id = ip_address if unit_id == 1 else f"{ip_address}:{unit_id}"
+    return DeviceInfo(
+        identifiers={(DOMAIN, device_id)},
+        name=f"Lambda Heatpump Test ({device_id})",
+        manufacturer="Lambda",
+        model="Heatpump",
+    )
+
+async def async_setup(hass: HomeAssistant, config) -> bool:
+    async def _async_rediscover(call: ServiceCall) -> None:
+        entry_id = call.data.get("config_entry_id")
+        for entry in hass.config_entries.async_entries(DOMAIN):
+            if entry_id and entry.entry_id != entry_id:
+                continue
+            # reload explicitly: without cached modules the data does not change and no listener fires
+            _async_update_data(hass, entry, {k: v for k, v in entry.data.items() if k != "modules"})
+            hass.config_entries.async_schedule_reload(entry.entry_id)
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_REDISCOVER_MODULES, _async_rediscover,
+        schema=vol.Schema({vol.Optional("config_entry_id"): cv.string}),
+    )
+
+    async def _async_write_setpoint(call: ServiceCall) -> ServiceResponse:
+        entry_id = call.data.get("config_entry_id")
+        loaded = {k: v for k, v in hass.data.get(DOMAIN, {}).items() if isinstance(v, dict) and "coordinator" in v}
+        if entry_id is None and len(loaded) == 1:
+            entry_id = next(iter(loaded))
+        if entry_id not in loaded:
+            raise HomeAssistantError("config_entry_id must name a loaded Lambda Heatpump Test entry")
+        spec = next(s for s in NUMBERS if s["key"] == call.data["setpoint"])
+        readback = await loaded[entry_id]["coordinator"].async_write_number(spec, call.data["value"])
+        return {"readback": readback}
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_WRITE_SETPOINT, _async_write_setpoint,
+        schema=vol.Schema({
+            vol.Optional("config_entry_id"): cv.string,
+            vol.Optional("setpoint", default=NUMBERS[0]["key"]): vol.In([s["key"] for s in NUMBERS]),
+            vol.Required("value"): vol.Coerce(float),
+        }),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    return True
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     hass.data.setdefault(DOMAIN, {})
+    gateway = async_get_gateway(hass, entry)
+    client = GatewayClient(gateway, entry.data.get("unit_id", 1),
+                           entry_option(entry, "unit_priority", DEFAULT_UNIT_PRIORITY))
+
+    @callback
+    def _scope_unique_id(entity_entry: er.RegistryEntry):
+        # unique IDs used to be global, so a second entry (other unit or host) collided with the first
+        if entity_entry.unique_id.startswith(f"{DOMAIN}_{entry.entry_id}_"):
+            return None
+        return {"new_unique_id": entity_entry.unique_id.replace(f"{DOMAIN}_", f"{DOMAIN}_{entry.entry_id}_", 1)}
+
+    await er.async_migrate_entries(hass, entry.entry_id, _scope_unique_id)
+
+    # with fast start a silent unit must not hold up setup: the probe costs up to one timeout per module,
+    # so the entities start with the default modules and discovery runs in the background
+    probe_later = "modules" not in entry.data and entry_option(entry, "fast_start", True)
+    if "modules" not in entry.data and not probe_later:
+        modules = await async_discover_modules(hass, client, entry)
+        if modules is not None:
+            # cached so later restarts skip the probe; rediscover_modules clears it
+            hass.config_entries.async_update_entry(entry, data={**entry.data, "modules": modules})
+    modules = entry_modules(entry.data)
+    sensors = build_sensors(modules)
+
+    # runtime, starts and COP windows survive restarts
+    derived = DerivedMetrics(modules.get("heat_pump", []))
+    store = Store(hass, DERIVED_STORAGE_VERSION, _derived_store_key(entry))
+    derived.restore(await store.async_load())
+
+    snapshot_store = Store(hass, SNAPSHOT_STORAGE_VERSION, _snapshot_store_key(entry))
+    coordinator = LambdaCoordinator(hass, entry, client, sensors, derived, store, snapshot_store)
+    names = {s["name"] for s in sensors + derived.specs}
+    # fast start: entities come up with the last known values, the first live refresh runs in the background
+    fast_start = entry_option(entry, "fast_start", True) and coordinator.restore_snapshot(
+        await snapshot_store.async_load() or {}, names)
+    if not fast_start:
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except Exception:
+            async_release_gateway(hass, entry)
+            raise
+    if not entry.pref_disable_polling:
+        entry.async_create_background_task(hass, coordinator.async_poll(refresh_now=fast_start), f"{DOMAIN} polling")
+    elif fast_start:
+        entry.async_create_background_task(hass, coordinator.async_refresh(), f"{DOMAIN} first refresh")
+    hass.data[DOMAIN][entry.entry_id] = {"client": client, "coordinator": coordinator,
+                                         "sensors": sensors + derived.specs}
+    if probe_later:
+        entry.async_create_background_task(
+            hass, _async_discover_in_background(hass, client, entry, modules), f"{DOMAIN} module discovery")
+
+    entry.async_on_unload(entry.add_update_listener(_async_options_updated))
     # Forward to platforms without blocking the event loop
     hass.async_create_task(hass.config_entries.async_forward_entry_setups(entry, PLATFORMS))
     return True
 
+async def _async_discover_in_background(hass: HomeAssistant, client: GatewayClient, entry: ConfigEntry,
+                                        running: Dict[str, List[int]]) -> None:
+    """Probe the modules after a fast start; reload only if they differ from the ones the entry runs with."""
+    modules = await async_discover_modules(hass, client, entry)
+    if modules is None:
+        return
+    # cached so later restarts skip the probe; rediscover_modules clears it
+    _async_update_data(hass, entry, {**entry.data, "modules": modules})
+    if _module_set(modules) != _module_set(running):
+        _LOGGER.info("Lambda Heatpump Test: reloading %s with the discovered modules", entry.title)
+        hass.config_entries.async_schedule_reload(entry.entry_id)
+
+def _module_set(modules: Dict[str, List[int]]) -> Set[Tuple[str, int]]:
+    return {(kind, n) for kind, numbers in modules.items() for n in numbers}
+
+@callback
+def _async_update_data(hass: HomeAssistant, entry: ConfigEntry, data: Dict[str, Any]) -> None:
+    """Change entry data without the update listener reloading the entry."""
+    entry_data = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if entry_data is not None and data != entry.data:
+        entry_data["skip_reload"] = True
+    hass.config_entries.async_update_entry(entry, data=data)
+
+async def _async_options_updated(hass: HomeAssistant, entry: ConfigEntry):
+    entry_data = hass.data[DOMAIN].get(entry.entry_id)
+    if entry_data is not None and entry_data.pop("skip_reload", False):
+        return
+    # tiers, intervals and modules are compiled into the read plans, so rebuild them
+    await hass.config_entries.async_reload(entry.entry_id)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id, None)
+        entry_data = hass.data[DOMAIN].pop(entry.entry_id, None)
+        if entry_data:
+            await entry_data["coordinator"].async_save_state()
+        async_release_gateway(hass, entry)
     return unload_ok
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    await Store(hass, DERIVED_STORAGE_VERSION, _derived_store_key(entry)).async_remove()
+    await Store(hass, SNAPSHOT_STORAGE_VERSION, _snapshot_store_key(entry)).async_remove()
+
+def _derived_store_key(entry: ConfigEntry) -> str:
+    return f"{DOMAIN}.{entry.entry_id}.derived"
+
+def _snapshot_store_key(entry: ConfigEntry) -> str:
+    return f"{DOMAIN}.{entry.entry_id}.snapshot"
@@ -3,22 +3,48 @@ from __future__ import annotations
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.const import CONF_IP_ADDRESS
+from homeassistant.core import callback
 import homeassistant.helpers.config_validation as cv
 
 from . import DOMAIN
+from .lambda_heatpump_test_api import DEFAULT_MAX_INFLIGHT, DEFAULT_PORT, DEFAULT_TIMEOUT, TRANSPORT_ASYNC, TRANSPORT_SYNC
+from .coordinator import (
+    DEFAULT_FAST_INTERVAL,
+    DEFAULT_SLOW_INTERVAL,
+    DEFAULT_STATE_INTERVAL,
+    DEFAULT_UPDATE_INTERVAL,
+    TIER_FAST,
+    TIER_SLOW,
+    entry_option,
+    sensor_tier,
+)
+from .gateway import DEFAULT_UNIT_PRIORITY
+from .registers import build_sensors, entry_modules
+from .read_plan import DEFAULT_MAX_BLOCK, DEFAULT_MAX_GAP, MODBUS_MAX_BLOCK
 
 class LambdaHeatpumpTestConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        return LambdaHeatpumpTestOptionsFlow(config_entry)
+
     async def async_step_user(self, user_input=None):
         errors = {}
         SCHEMA = vol.Schema({
             vol.Required(CONF_IP_ADDRESS): cv.string,
+            vol.Optional("port", default=DEFAULT_PORT): cv.port,
             vol.Optional("update_interval", default=30): vol.All(vol.Coerce(int), vol.Range(min=5, max=3600)),
             vol.Required("installed_before_2025", default=False): cv.boolean,
             vol.Optional("has_heat_circuit_2", default=True): cv.boolean,
             vol.Optional("has_heat_circuit_3", default=True): cv.boolean,
                 vol.Optional("unit_id", default=1): vol.All(vol.Coerce(int), vol.Range(min=0, max=255)),
+            vol.Optional("max_register_gap", default=DEFAULT_MAX_GAP): vol.All(vol.Coerce(int), vol.Range(min=0, max=100)),
+            vol.Optional("max_block_size", default=DEFAULT_MAX_BLOCK): vol.All(vol.Coerce(int), vol.Range(min=2, max=MODBUS_MAX_BLOCK)),
+            vol.Optional("transport", default=TRANSPORT_SYNC): vol.In([TRANSPORT_SYNC, TRANSPORT_ASYNC]),
+            vol.Optional("timeout", default=DEFAULT_TIMEOUT): vol.All(vol.Coerce(float), vol.Range(min=0.5, max=30)),
+            vol.Optional("max_inflight", default=DEFAULT_MAX_INFLIGHT): vol.All(vol.Coerce(int), vol.Range(min=1, max=8)),
         })
 
         if user_input is None:
@@ -28,11 +54,49 @@ class LambdaHeatpumpTestConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         data = {
             "ip_address": user_input["ip_address"],
+            "port": user_input.get("port", DEFAULT_PORT),
             "update_interval": user_input.get("update_interval", 30),
             "has_heat_circuit_2": user_input.get("has_heat_circuit_2", True),
             "has_heat_circuit_3": user_input.get("has_heat_circuit_3", True),
             "word_order": word_order,
                 "unit_id": user_input.get("unit_id", 1),
+            "max_register_gap": user_input.get("max_register_gap", DEFAULT_MAX_GAP),
+            "max_block_size": user_input.get("max_block_size", DEFAULT_MAX_BLOCK),
+            "transport": user_input.get("transport", TRANSPORT_SYNC),
+            "timeout": user_input.get("timeout", DEFAULT_TIMEOUT),
+            "max_inflight": user_input.get("max_inflight", DEFAULT_MAX_INFLIGHT),
         }
         title = f"Lambda Heatpump Test ({user_input['ip_address']})"
         return self.async_create_entry(title=title, data=data)
+
+
+class LambdaHeatpumpTestOptionsFlow(config_entries.OptionsFlow):
+    """Polling tiers, the unit's priority on a shared gateway, fast start, diagnostic sensors and history mode."""
+
+    def __init__(self, config_entry):
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        sensors = build_sensors(entry_modules(self._entry.data))
+        names = {s["name"]: s["name"] for s in sensors}
+        fast = [s["name"] for s in sensors if sensor_tier(self._entry, s) == TIER_FAST]
+        slow = [s["name"] for s in sensors if sensor_tier(self._entry, s) == TIER_SLOW]
+        interval = vol.All(vol.Coerce(int), vol.Range(min=1, max=86400))
+        schema = vol.Schema({
+            vol.Optional("fast_interval", default=entry_option(self._entry, "fast_interval", DEFAULT_FAST_INTERVAL)): interval,
+            vol.Optional("update_interval", default=entry_option(self._entry, "update_interval", DEFAULT_UPDATE_INTERVAL)): interval,
+            vol.Optional("slow_interval", default=entry_option(self._entry, "slow_interval", DEFAULT_SLOW_INTERVAL)): interval,
+            vol.Optional("fast_sensors", default=fast): cv.multi_select(names),
+            vol.Optional("slow_sensors", default=slow): cv.multi_select(names),
+            vol.Optional("unit_priority", default=entry_option(self._entry, "unit_priority", DEFAULT_UNIT_PRIORITY)):
+                vol.All(vol.Coerce(int), vol.Range(min=0, max=9)),
+            vol.Optional("diagnostic_sensors", default=self._entry.options.get("diagnostic_sensors", False)): cv.boolean,
+            vol.Optional("fast_start", default=entry_option(self._entry, "fast_start", True)): cv.boolean,
+            vol.Optional("history_mode", default=entry_option(self._entry, "history_mode", False)): cv.boolean,
+            vol.Optional("state_interval", default=entry_option(self._entry, "state_interval", DEFAULT_STATE_INTERVAL)):
+                vol.All(vol.Coerce(int), vol.Range(min=5, max=3600)),
+        })
+        return self.async_show_form(step_id="init", data_schema=schema)
@@ -0,0 +1,259 @@
+"""DataUpdateCoordinator with per-tier polling of the Lambda register map."""
+from __future__ import annotations
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+import asyncio
+import inspect
+import logging
+import time
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .derived import DerivedMetrics
+from .fleet import async_get_fleet
+from .history import HistoryBuffer, async_import_statistics, history_specs
+from .lambda_heatpump_test_api import AsyncPlanReader
+from .read_plan import DEFAULT_MAX_BLOCK, DEFAULT_MAX_GAP, ReadBlock, build_read_plan, spec_registers
+from .registers import TIER_FAST, TIER_NORMAL, TIER_SLOW, TIERS
+from .stats import ReadStats
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_UPDATE_INTERVAL = 30
+DEFAULT_FAST_INTERVAL = 5
+DEFAULT_SLOW_INTERVAL = 300
+DERIVED_SAVE_DELAY = 300
+DEFAULT_STATE_INTERVAL = 60
+SNAPSHOT_SAVE_DELAY = 600
+# DataUpdateCoordinator takes the entry since HA 2024.11; before, it came from the setup context only
+_TAKES_CONFIG_ENTRY = "config_entry" in inspect.signature(DataUpdateCoordinator.__init__).parameters
+
+
+def entry_option(entry: ConfigEntry, key: str, default: Any = None) -> Any:
+    """Options override the values stored at setup time."""
+    return entry.options.get(key, entry.data.get(key, default))
+
+
+def tier_intervals(entry: ConfigEntry) -> Dict[str, float]:
+    return {
+        TIER_FAST: entry_option(entry, "fast_interval", DEFAULT_FAST_INTERVAL),
+        TIER_NORMAL: entry_option(entry, "update_interval", DEFAULT_UPDATE_INTERVAL),
+        TIER_SLOW: entry_option(entry, "slow_interval", DEFAULT_SLOW_INTERVAL),
+    }
+
+
+def sensor_tier(entry: ConfigEntry, spec: Dict[str, Any]) -> str:
+    """Tier of a sensor: declared in the register map, overridable via the options flow.
+
+    Once the options flow has been saved its fast/slow lists are
+    authoritative; sensors in neither list are polled at the normal rate.
+    """
+    fast = entry.options.get("fast_sensors")
+    slow = entry.options.get("slow_sensors")
+    if fast is None and slow is None:
+        tier = spec.get("tier", TIER_NORMAL)
+        return tier if tier in TIERS else TIER_NORMAL
+    if spec["name"] in (fast or []):
+        return TIER_FAST
+    if spec["name"] in (slow or []):
+        return TIER_SLOW
+    return TIER_NORMAL
+
+
+class LambdaCoordinator(DataUpdateCoordinator):
+    """Ticks at the fastest tier's interval and reads only the tiers that are due.
+
+    Every combination of due tiers gets its own read plan (compiled on first
+    use), so a fast-only tick never drags static registers along while a tick
+    where all tiers are due still coalesces across them. Values of tiers that
+    are not due are carried over from the previous refresh.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry,
+                 client: AsyncPlanReader, specs: Sequence[Dict[str, Any]],
+                 derived: Optional[DerivedMetrics] = None, store: Optional[Store] = None,
+                 snapshot_store: Optional[Store] = None):
+        self.client = client
+        self.derived = derived
+        self._store = store
+        self._snapshot_store = snapshot_store
+        self.stats = client.stats if client.stats is not None else ReadStats()
+        self.intervals = tier_intervals(entry)
+        self._plan_args = {
+            "max_gap": entry.data.get("max_register_gap", DEFAULT_MAX_GAP),
+            "max_block": entry.data.get("max_block_size", DEFAULT_MAX_BLOCK),
+            "word_order": entry.data.get("word_order", "big"),
+        }
+        by_tier: Dict[str, List[Dict[str, Any]]] = {tier: [] for tier in TIERS}
+        for spec in specs:
+            by_tier[sensor_tier(entry, spec)].append(spec)
+        self.tier_specs = {tier: tier_specs for tier, tier_specs in by_tier.items() if tier_specs}
+        self.plans: Dict[FrozenSet[str], List[ReadBlock]] = {}
+        self._next_due: Dict[str, float] = {tier: 0.0 for tier in self.tier_specs}
+        # raw register values of the last refresh and the sensors whose raw value changed in it
+        self.raw: Dict[str, Optional[int]] = {}
+        self.changed: Set[str] = set()
+        self._readback_blocks: Dict[Tuple[int, int], ReadBlock] = {}
+        self._applied_at: Dict[str, float] = {}  # read-backs newer than a running refresh win over it
+        tick = min((self.intervals[tier] for tier in self.tier_specs), default=DEFAULT_UPDATE_INTERVAL)
+        # history mode: fast sensors go to the ring buffer at full rate, entity states follow every state_interval
+        self.history: Optional[HistoryBuffer] = None
+        self.state_interval = 0
+        if entry_option(entry, "history_mode", False):
+            self.history = HistoryBuffer(history_specs(self.tier_specs.get(TIER_FAST, [])), tick)
+            self.state_interval = entry_option(entry, "state_interval", DEFAULT_STATE_INTERVAL)
+        self._entry_id = entry.entry_id
+        self._title = entry.title
+        self.fleet = async_get_fleet(hass)
+        self._pending_changed: Set[str] = set()
+        self._last_notify = 0.0
+        self._notified_ok = True
+        self.tick = tick
+        # no update_interval: async_poll refreshes in the entry's fleet slot
+        super().__init__(
+            hass,
+            _LOGGER,
+            name="Lambda Heatpump Test Coordinator",
+            **({"config_entry": entry} if _TAKES_CONFIG_ENTRY else {}),
+        )
+        self.config_entry = entry
+
+    async def async_poll(self, refresh_now: bool = False) -> None:
+        """Refresh in this entry's fleet slot until cancelled (runs as an entry background task)."""
+        loop = self.hass.loop
+        if refresh_now:
+            await self.async_refresh()
+        slot = self.fleet.next_slot(self._entry_id, self._title, self.tick, loop.time())
+        try:
+            while True:
+                await asyncio.sleep(slot - loop.time())
+                await self.async_refresh()
+                slot = self.fleet.refresh_done(self._entry_id, self._title, self.tick, slot, loop.time())
+        finally:
+            self.fleet.remove(self._entry_id)
+
+    def plan_for(self, tiers: FrozenSet[str]) -> List[ReadBlock]:
+        plan = self.plans.get(tiers)
+        if plan is None:
+            specs = [spec for tier in TIERS if tier in tiers for spec in self.tier_specs.get(tier, ())]
+            plan = self.plans[tiers] = build_read_plan(specs, **self._plan_args)
+            _LOGGER.debug("Lambda Heatpump Test: tiers %s, %d block reads: %s", sorted(tiers), len(plan), plan)
+        return plan
+
+    def _due_blocks(self) -> List[ReadBlock]:
+        now = time.monotonic()
+        # half a tick of slack so a tier is not skipped because the timer fired early
+        slack = self.tick / 2
+        due = set()
+        for tier, next_due in self._next_due.items():
+            if now + slack >= next_due:
+                self._next_due[tier] = now + self.intervals[tier]
+                due.add(tier)
+        return self.plan_for(frozenset(due)) if due else []
+
+    async def _async_update_data(self) -> Dict[str, Any]:
+        if not self.last_update_success:
+            # after a failed refresh re-read everything instead of merging stale tiers
+            self._next_due = dict.fromkeys(self._next_due, 0.0)
+        self.changed = set()
+        blocks = self._due_blocks()
+        raw: Dict[str, Optional[int]] = {}
+        started = time.monotonic()
+        try:
+            fresh = await self.client.async_read_plan(blocks, raw)
+        except Exception as e:
+            self.stats.record_refresh(time.monotonic() - started, sum(len(block.specs) for block in blocks))
+            raise UpdateFailed(str(e))
+        for name in [name for name, at in self._applied_at.items() if at > started]:
+            fresh.pop(name, None)
+            raw.pop(name, None)
+        if self.history is not None:
+            self.history.append(time.time(), raw)
+            async_import_statistics(self.hass, self._entry_id, self.history)
+        failed = sum(1 for value in raw.values() if value is None)
+        self.stats.record_refresh(time.monotonic() - started, failed)
+        _LOGGER.debug("Lambda Heatpump Test: refresh of %d blocks took %.0f ms, %d sensors failed",
+                      len(blocks), self.stats.refresh.last, failed)
+        self.changed = {name for name, value in raw.items() if name not in self.raw or self.raw[name] != value}
+        self.raw.update(raw)
+        data = dict(self.data or {})
+        data.update(fresh)
+        if self.derived is not None:
+            derived = self.derived.update(data, self.raw)
+            self.changed.update(name for name, value in derived.items() if data.get(name) != value)
+            data.update(derived)
+            if self._store is not None:
+                self._store.async_delay_save(self.derived.as_dict, DERIVED_SAVE_DELAY)
+        if self._snapshot_store is not None:
+            self._snapshot_store.async_delay_save(self._snapshot, SNAPSHOT_SAVE_DELAY)
+        return data
+
+    def _snapshot(self) -> Dict[str, Any]:
+        return {"saved": time.time(), "data": self.data, "raw": self.raw}
+
+    def restore_snapshot(self, snapshot: Dict[str, Any], names: Set[str]) -> bool:
+        """Start from the last known values (fast start); False if there is nothing usable."""
+        data = {name: value for name, value in (snapshot.get("data") or {}).items() if name in names}
+        if not data:
+            return False
+        self.raw = {name: value for name, value in (snapshot.get("raw") or {}).items() if name in names}
+        self.data = data
+        _LOGGER.debug("Lambda Heatpump Test: starting from a snapshot of %d values taken %.0f s ago",
+                      len(data), time.time() - snapshot.get("saved", time.time()))
+        return True
+
+    async def async_save_state(self) -> None:
+        """Write derived metrics and the snapshot now instead of after the save delay."""
+        if self.derived is not None and self._store is not None:
+            await self._store.async_save(self.derived.as_dict())
+        if self._snapshot_store is not None and self.data:
+            await self._snapshot_store.async_save(self._snapshot())
+
+    async def async_write_number(self, spec: Dict[str, Any], value: float) -> Dict[str, Any]:
+        """Write a NUMBERS register and apply the read-back right away; returns the read-back values."""
+        raw_value = int(round(value / (spec.get("scale") or 1)))
+        low, high = (-0x8000, 0x7FFF) if spec.get("data_type") == "int16" else (0, 0xFFFF)
+        if not low <= raw_value <= high:
+            raise HomeAssistantError(f"{value} is out of range for {spec['name']}")
+        start, count = spec["readback"]
+        registers = await self.client.async_write_read_registers(spec["register"], [raw_value & 0xFFFF], start, count)
+        return self.apply_registers(start, count, registers)
+
+    def apply_registers(self, start: int, count: int, registers: List[int]) -> Dict[str, Any]:
+        """Decode registers read outside a refresh into the data and notify listeners."""
+        block = self._readback_blocks.get((start, count))
+        if block is None:
+            specs = [spec for tier_specs in self.tier_specs.values() for spec in tier_specs
+                     if start <= spec_registers(spec)[0] and sum(spec_registers(spec)) <= start + count]
+            block = self._readback_blocks[(start, count)] = ReadBlock(
+                start, count, specs, self._plan_args["word_order"]).compile()
+        fresh: Dict[str, Any] = {}
+        raw: Dict[str, Optional[int]] = {}
+        block.decode_into(registers, fresh, raw)
+        now = time.monotonic()
+        self._applied_at.update(dict.fromkeys(fresh, now))
+        self.changed = {name for name, value in raw.items() if self.raw.get(name) != value}
+        self.raw.update(raw)
+        self.data = {**(self.data or {}), **fresh}
+        self.async_update_listeners(force=True)
+        return fresh
+
+    @callback
+    def async_update_listeners(self, force: bool = False) -> None:
+        """Notify entities; in history mode at most every `state_interval` seconds.
+
+        Changes of skipped refreshes are collected so entities still see them.
+        Failures and the first success after one are passed on right away.
+        """
+        self._pending_changed |= self.changed
+        now = time.monotonic()
+        if (not force and self.state_interval and self.last_update_success and self._notified_ok
+                and now - self._last_notify < self.state_interval):
+            return
+        self.changed, self._pending_changed = self._pending_changed, set()
+        self._last_notify = now
+        self._notified_ok = self.last_update_success
+        super().async_update_listeners()
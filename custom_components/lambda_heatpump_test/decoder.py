@@ -0,0 +1,91 @@
+"""Precompiled decoding of a block of raw holding registers into sensor values."""
+from __future__ import annotations
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+KIND_U16 = 0
+KIND_S16 = 1
+KIND_U32 = 2
+KIND_S32 = 3
+
+
+def _kind(spec: Dict[str, Any]) -> int:
+    dtype = (spec.get("data_type") or "int16").lower()
+    if isinstance(spec.get("register"), list):
+        return KIND_S32 if "int32" in dtype and "uint32" not in dtype else KIND_U32
+    return KIND_U16 if "uint16" in dtype else KIND_S16
+
+
+class BlockDecoder:
+    """Decode plan for one block, compiled once from the sensor specs.
+
+    Everything that used to be looked up per sensor and poll (data type,
+    register order, scale, precision, description_map) is resolved here into
+    parallel tuples, so a poll is a single pass over the raw buffer.
+    """
+    __slots__ = ("count", "names", "kinds", "scales", "precisions", "enums", "_hi", "_lo")
+
+    def __init__(self, start: int, count: int, specs: Sequence[Dict[str, Any]], word_order: str = "big"):
+        self.count = count
+        names: List[str] = []
+        kinds: List[int] = []
+        scales: List[Optional[float]] = []
+        precisions: List[Optional[int]] = []
+        enums: List[Optional[Tuple[str, ...]]] = []
+        hi: List[int] = []
+        lo: List[int] = []
+        for spec in specs:
+            reg = spec.get("register")
+            kind = _kind(spec)
+            if isinstance(reg, list):
+                # registers listed in descending order swap the word positions
+                first, second = (0, 1) if reg[0] <= reg[1] else (1, 0)
+                w0, w1 = min(reg) - start + first, min(reg) - start + second
+                h, l = (w1, w0) if word_order == "little" else (w0, w1)
+            else:
+                h = l = reg - start
+            scale = spec.get("scale", 1)
+            precision = spec.get("precision", 0)
+            desc = spec.get("description_map")
+            names.append(spec["name"])
+            kinds.append(kind)
+            scales.append(None if scale in (None, 1) else scale)
+            precisions.append(None if precision is None else int(precision))
+            enums.append(tuple(desc) if isinstance(desc, list) else None)
+            hi.append(h)
+            lo.append(l)
+        self.names = tuple(names)
+        self.kinds = tuple(kinds)
+        self.scales = tuple(scales)
+        self.precisions = tuple(precisions)
+        self.enums = tuple(enums)
+        self._hi = tuple(hi)
+        self._lo = tuple(lo)
+
+    def decode_into(self, registers: Sequence[int], data: Dict[str, Any],
+                    raw: Optional[Dict[str, int]] = None) -> None:
+        """Decode into `data`; `raw` (optional) receives the unscaled register values."""
+        if len(registers) < self.count:
+            raise ValueError(f"expected {self.count} registers, got {len(registers)}")
+        u16 = array("H", registers[:self.count])
+        s16 = array("h", u16.tobytes())
+        for name, kind, hi, lo, scale, precision, enum in zip(
+            self.names, self.kinds, self._hi, self._lo, self.scales, self.precisions, self.enums
+        ):
+            if kind == KIND_S16:
+                val = s16[hi]
+            elif kind == KIND_U16:
+                val = u16[hi]
+            else:
+                val = (u16[hi] << 16) | u16[lo]
+                if kind == KIND_S32 and val & 0x80000000:
+                    val -= 0x100000000
+            if raw is not None:
+                raw[name] = val
+            if scale is not None:
+                val = val * scale
+            if precision is not None:
+                val = round(val, precision)
+            if enum is not None and 0 <= int(val) < len(enum):
+                val = enum[int(val)]
+            data[name] = val
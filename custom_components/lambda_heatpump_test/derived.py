@@ -0,0 +1,179 @@
+"""Metrics derived from values the coordinator already polls.
+
+Fed once per refresh, every update is O(1): thermal power from flow and
+spread, COP over rolling windows from deltas of the energy counters, and
+compressor runtime/starts from the heat pump state. The accumulators are
+plain dicts (`as_dict`/`restore`) so they can be persisted in a Store.
+"""
+from __future__ import annotations
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+import time
+
+from .registers import HEAT_PUMP_SENSORS, module_prefix
+
+# Wh to heat one litre of water by one kelvin
+WATER_HEAT_CAPACITY = 1.163
+# heat pump states with the compressor running: start compressor, pre-regulation, regulation, cooling, defrosting
+RUNNING_STATES = frozenset({5, 6, 7, 9, 10})
+# window and snapshot spacing in seconds
+COP_WINDOWS: Dict[str, Tuple[int, int]] = {"1h": (3600, 300), "24h": (86400, 3600)}
+# the heating season (and with it the seasonal COP) starts on the 1st of this month
+SEASON_START_MONTH = 9
+# below this much electrical energy a COP is mostly counter resolution
+MIN_COP_ENERGY_WH = 20
+# a longer gap between refreshes (restart, outage) does not count as runtime
+MAX_RUNTIME_GAP = 600
+# register scales of the heat pump sensors thermal power is computed from
+_SCALES = {s["name"]: s.get("scale") or 1 for s in HEAT_PUMP_SENSORS}
+
+
+def season_key(now: float) -> int:
+    """Year in which the heating season containing `now` started."""
+    local = time.localtime(now)
+    return local.tm_year if local.tm_mon >= SEASON_START_MONTH else local.tm_year - 1
+
+
+def _cop(thermal_wh: float, electric_wh: float) -> Optional[float]:
+    if electric_wh < MIN_COP_ENERGY_WH or thermal_wh < 0:
+        return None
+    return round(thermal_wh / electric_wh, 2)
+
+
+class CounterWindow:
+    """Counter snapshots every `spacing` seconds covering `window`; the delta over the window is O(1)."""
+
+    def __init__(self, window: int, spacing: int):
+        self.spacing = spacing
+        self.snapshots: Deque[Tuple[float, float, float]] = deque(maxlen=window // spacing + 1)
+
+    def update(self, now: float, electric: float, thermal: float) -> Tuple[float, float]:
+        if not self.snapshots or now - self.snapshots[-1][0] >= self.spacing:
+            self.snapshots.append((now, electric, thermal))
+        _, electric0, thermal0 = self.snapshots[0]
+        return electric - electric0, thermal - thermal0
+
+    def as_list(self) -> List[Tuple[float, float, float]]:
+        return list(self.snapshots)
+
+    def restore(self, snapshots: Iterable[Iterable[float]]) -> None:
+        self.snapshots.clear()
+        self.snapshots.extend(tuple(s) for s in snapshots)
+
+
+class HeatPumpMetrics:
+    """Derived values of one heat pump module."""
+
+    def __init__(self, n: int):
+        prefix = module_prefix("heat_pump", n)
+        self.n = n
+        self.src = {key: f"{prefix} {key}" for key in (
+            "State", "Flow Line Temperature", "Return Line Temperature", "Volume Flow Heat Sink",
+            "Compressor Power Consumption Accumulated", "Compressor Thermal Energy Output Accumulated")}
+        self.thermal_power = f"{prefix} Thermal Power"
+        self.cop = {label: f"{prefix} COP {label}" for label in COP_WINDOWS}
+        self.scop = f"{prefix} COP Season"
+        self.runtime = f"{prefix} Compressor Runtime"
+        self.starts = f"{prefix} Compressor Starts"
+        self.windows = {label: CounterWindow(*spec) for label, spec in COP_WINDOWS.items()}
+        self.season: Optional[List[float]] = None  # [season key, electric Wh, thermal Wh] at season start
+        self.runtime_s = 0.0
+        self.cycles = 0
+        self.running: Optional[bool] = None
+        self.last_seen: Optional[float] = None
+
+    def specs(self) -> List[Dict[str, Any]]:
+        cop = {"unit": "", "precision": 2, "state_class": "measurement"}
+        return [
+            {"name": self.thermal_power, "unit": "W", "precision": 0, "device_class": "power", "state_class": "measurement"},
+            *({"name": name, **cop} for name in self.cop.values()),
+            {"name": self.scop, **cop},
+            {"name": self.runtime, "unit": "h", "precision": 2, "device_class": "duration", "state_class": "total_increasing"},
+            {"name": self.starts, "unit": "", "precision": 0, "state_class": "total_increasing"},
+        ]
+
+    def update(self, data: Dict[str, Any], raw: Dict[str, Any], now: float) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        src = self.src
+
+        # from the raw words: the temperatures in `data` are rounded to 0.1 K, which would move the power
+        # in steps of ~116 W at 1000 l/h
+        flow = raw.get(src["Volume Flow Heat Sink"])
+        t_flow, t_return = raw.get(src["Flow Line Temperature"]), raw.get(src["Return Line Temperature"])
+        if None not in (flow, t_flow, t_return):
+            spread = t_flow * _SCALES["Flow Line Temperature"] - t_return * _SCALES["Return Line Temperature"]
+            out[self.thermal_power] = round(max(flow * _SCALES["Volume Flow Heat Sink"], 0) * spread * WATER_HEAT_CAPACITY)
+
+        electric = data.get(src["Compressor Power Consumption Accumulated"])
+        thermal = data.get(src["Compressor Thermal Energy Output Accumulated"])
+        if electric is not None and thermal is not None:
+            for label, window in self.windows.items():
+                if window.snapshots and (electric < window.snapshots[-1][1] or thermal < window.snapshots[-1][2]):
+                    window.snapshots.clear()  # counter reset or wrong word order: start over
+                d_electric, d_thermal = window.update(now, electric, thermal)
+                out[self.cop[label]] = _cop(d_thermal, d_electric)
+            key = season_key(now)
+            if self.season is None or self.season[0] != key or electric < self.season[1] or thermal < self.season[2]:
+                self.season = [key, electric, thermal]
+            out[self.scop] = _cop(thermal - self.season[2], electric - self.season[1])
+
+        state = raw.get(src["State"])
+        if state is not None:
+            running = int(state) in RUNNING_STATES
+            if self.running is not None and self.last_seen is not None:
+                gap = now - self.last_seen
+                if self.running and 0 < gap <= MAX_RUNTIME_GAP:
+                    self.runtime_s += gap
+                if running and not self.running:
+                    self.cycles += 1
+            self.running = running
+            self.last_seen = now
+        out[self.runtime] = round(self.runtime_s / 3600, 2)
+        out[self.starts] = self.cycles
+        return out
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "windows": {label: w.as_list() for label, w in self.windows.items()},
+            "season": self.season,
+            "runtime_s": self.runtime_s,
+            "cycles": self.cycles,
+            "running": self.running,
+            "last_seen": self.last_seen,
+        }
+
+    def restore(self, stored: Dict[str, Any]) -> None:
+        for label, snapshots in stored.get("windows", {}).items():
+            if label in self.windows:
+                self.windows[label].restore(snapshots)
+        self.season = stored.get("season")
+        self.runtime_s = float(stored.get("runtime_s", 0.0))
+        self.cycles = int(stored.get("cycles", 0))
+        self.running = stored.get("running")
+        self.last_seen = stored.get("last_seen")
+
+
+class DerivedMetrics:
+    """Derived metrics of every installed heat pump."""
+
+    def __init__(self, heat_pumps: Iterable[int]):
+        self.heat_pumps = [HeatPumpMetrics(n) for n in sorted(heat_pumps)]
+
+    @property
+    def specs(self) -> List[Dict[str, Any]]:
+        return [spec for hp in self.heat_pumps for spec in hp.specs()]
+
+    def update(self, data: Dict[str, Any], raw: Dict[str, Any], now: Optional[float] = None) -> Dict[str, Any]:
+        now = time.time() if now is None else now
+        out: Dict[str, Any] = {}
+        for hp in self.heat_pumps:
+            out.update(hp.update(data, raw, now))
+        return out
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {str(hp.n): hp.as_dict() for hp in self.heat_pumps}
+
+    def restore(self, stored: Optional[Dict[str, Any]]) -> None:
+        for hp in self.heat_pumps:
+            if stored and str(hp.n) in stored:
+                hp.restore(stored[str(hp.n)])
@@ -0,0 +1,54 @@
+"""Diagnostics download: entry settings, read plans, gateway and fleet state, quarantined blocks and request statistics."""
+from __future__ import annotations
+from typing import Any, Dict
+
+from homeassistant.components.diagnostics import REDACTED, async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .coordinator import LambdaCoordinator
+from .fleet import async_get_fleet
+
+DOMAIN = "lambda_heatpump_test"
+TO_REDACT = {"ip_address"}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> Dict[str, Any]:
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    coordinator: LambdaCoordinator = entry_data["coordinator"]
+    diagnostics = {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "last_exception": repr(coordinator.last_exception) if coordinator.last_exception else None,
+            "tick_s": coordinator.tick,
+            "intervals_s": coordinator.intervals,
+            "sensors_per_tier": {tier: len(specs) for tier, specs in coordinator.tier_specs.items()},
+            "plans": {
+                "+".join(sorted(tiers)): [f"{block.start}+{block.count}" for block in plan]
+                for tiers, plan in coordinator.plans.items()
+            },
+            "unavailable": sorted(name for name, value in coordinator.raw.items() if value is None),
+        },
+        "gateway": entry_data["client"].gateway.as_dict(),
+        "fleet": async_get_fleet(hass).as_dict(),
+        "quarantined_blocks": entry_data["client"].health.as_dict(),
+        "stats": coordinator.stats.as_dict(),
+        "derived": coordinator.derived.as_dict() if coordinator.derived is not None else None,
+        "history": coordinator.history.as_dict() if coordinator.history is not None else None,
+    }
+    # error messages (the gateway's own and pymodbus' "Failed to connect[ModbusTcpClient host:port]") name the host
+    return _strip_host(diagnostics, entry.data["ip_address"])
+
+
+def _strip_host(value: Any, host: str) -> Any:
+    if isinstance(value, str):
+        return value.replace(host, REDACTED)
+    if isinstance(value, dict):
+        return {key: _strip_host(item, host) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_strip_host(item, host) for item in value]
+    return value
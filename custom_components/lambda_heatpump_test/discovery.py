@@ -0,0 +1,34 @@
+"""Probe which Lambda modules (heat pumps, boilers, buffers, solar, heating circuits) exist."""
+from __future__ import annotations
+from typing import Dict, List, Optional
+import logging
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .lambda_heatpump_test_api import AsyncPlanReader
+from .registers import modules_from_probe, probe_candidates
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_discover_modules(hass: HomeAssistant, client: AsyncPlanReader,
+                                 entry: ConfigEntry) -> Optional[Dict[str, List[int]]]:
+    """Read the error-number register of every possible module in one pass.
+
+    Returns None when the probe is inconclusive (device unreachable, or not
+    even heat pump 1 answered), so that nothing wrong gets cached.
+    """
+    candidates = probe_candidates(entry.data)
+    registers = sorted(candidates)
+    try:
+        present = await client.async_probe_registers(registers)
+    except Exception as err:
+        _LOGGER.warning("Lambda Heatpump Test: module discovery failed: %s", err)
+        return None
+    modules = modules_from_probe(candidates, present)
+    if 1 not in modules["heat_pump"]:
+        _LOGGER.warning("Lambda Heatpump Test: module discovery found no heat pump, using defaults")
+        return None
+    _LOGGER.info("Lambda Heatpump Test: discovered modules %s", modules)
+    return modules
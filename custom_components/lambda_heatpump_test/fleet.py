@@ -0,0 +1,148 @@
+"""Refresh slots and the global transaction limit shared by all entries.
+
+Left to DataUpdateCoordinator, every entry refreshes one interval after its
+last refresh ended, so entries set up together poll in the same second
+forever. Here each entry gets an evenly spread phase within its tick and its
+coordinator's polling loop refreshes on that grid,
+and one semaphore caps the Modbus transactions in flight across all gateways
+(and with the sync transport the executor jobs). Refreshes that keep taking
+more than half their interval are reported as a warning and a repair issue.
+"""
+from __future__ import annotations
+from typing import Any, Dict, Optional
+import asyncio
+import logging
+import math
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import issue_registry as ir
+
+from .stats import Histogram
+
+_LOGGER = logging.getLogger(__name__)
+
+DOMAIN = "lambda_heatpump_test"
+DEFAULT_MAX_TRANSACTIONS = 8
+# late refreshes in a row before an entry counts as not keeping up
+OVERLOAD_STREAK = 3
+ISSUE_OVERLOADED = "fleet_overloaded"
+
+
+class _Slot:
+    __slots__ = ("title", "target", "late", "late_total", "refreshes")
+
+    def __init__(self, title: str):
+        self.title = title
+        self.target: Optional[float] = None
+        self.late = 0
+        self.late_total = 0
+        self.refreshes = 0
+
+
+class FleetScheduler:
+    """Phases of all polling entries (in order of registration) and the transaction semaphore."""
+
+    def __init__(self, hass: HomeAssistant, max_transactions: int = DEFAULT_MAX_TRANSACTIONS):
+        self.hass = hass
+        self.max_transactions = max(1, int(max_transactions))
+        self._transactions = asyncio.Semaphore(self.max_transactions)
+        self.in_flight = 0
+        self.transaction_wait = Histogram()
+        self._slots: Dict[str, _Slot] = {}
+        self.overloaded = False
+
+    async def async_acquire(self) -> None:
+        await self._transactions.acquire()
+        self.in_flight += 1
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._transactions.release()
+
+    def _respread(self) -> None:
+        # phases move when entries come and go; the next refresh of each is on time by definition
+        for slot in self._slots.values():
+            slot.target = None
+
+    def remove(self, entry_id: str) -> None:
+        if self._slots.pop(entry_id, None) is not None:
+            self._respread()
+            self._check()
+
+    def phase(self, entry_id: str) -> float:
+        """Fraction of the tick at which the entry refreshes."""
+        return list(self._slots).index(entry_id) / len(self._slots)
+
+    def next_slot(self, entry_id: str, title: str, tick: float, now: float) -> float:
+        """Loop time of the entry's first slot at least half a tick after `now`."""
+        slot = self._slots.get(entry_id)
+        if slot is None:
+            slot = self._slots[entry_id] = _Slot(title)
+            self._respread()
+        offset = self.phase(entry_id) * tick
+        # half a tick of room: a refresh that ran long skips a slot instead of bunching up with the next
+        slot.target = offset + math.ceil((now + tick / 2 - offset) / tick) * tick
+        return slot.target
+
+    def refresh_done(self, entry_id: str, title: str, tick: float, slot_time: float, now: float) -> float:
+        """Account the refresh of the slot at `slot_time` that ended at `now`; returns the next slot."""
+        slot = self._slots.get(entry_id)
+        # after a re-spread the entry has a new slot and this refresh is not held against it
+        if slot is not None and slot.target == slot_time:
+            slot.refreshes += 1
+            if now - slot_time > tick / 2:
+                slot.late += 1
+                slot.late_total += 1
+            else:
+                slot.late = 0
+            self._check()
+        return self.next_slot(entry_id, title, tick, now)
+
+    def _check(self) -> None:
+        late = [slot for slot in self._slots.values() if slot.late >= OVERLOAD_STREAK]
+        if late and not self.overloaded:
+            titles = ", ".join(slot.title for slot in late)
+            _LOGGER.warning(
+                "Lambda Heatpump Test: polling can't keep up, refreshes of %s took more than half their interval "
+                "%d times in a row (%d of %d transactions in flight, p95 wait for one %s ms); "
+                "use longer intervals or move sensors to a slower tier",
+                titles, OVERLOAD_STREAK, self.in_flight, self.max_transactions,
+                self.transaction_wait.percentile(0.95))
+            ir.async_create_issue(
+                self.hass, DOMAIN, ISSUE_OVERLOADED, is_fixable=False, severity=ir.IssueSeverity.WARNING,
+                translation_key=ISSUE_OVERLOADED, translation_placeholders={"entries": titles},
+            )
+        elif not any(slot.late for slot in self._slots.values()) and self.overloaded:
+            _LOGGER.info("Lambda Heatpump Test: polling keeps up again")
+            ir.async_delete_issue(self.hass, DOMAIN, ISSUE_OVERLOADED)
+        else:
+            return
+        self.overloaded = bool(late)
+
+    def as_dict(self) -> Dict[str, Any]:
+        now = self.hass.loop.time()
+        return {
+            "max_transactions": self.max_transactions,
+            "in_flight": self.in_flight,
+            "transaction_wait": self.transaction_wait.as_dict(),
+            "overloaded": self.overloaded,
+            "entries": {
+                entry_id: {
+                    "phase": round(self.phase(entry_id), 3),
+                    "next_refresh_in_s": None if slot.target is None else round(slot.target - now, 1),
+                    "refreshes": slot.refreshes,
+                    "late": slot.late_total,
+                    "late_in_a_row": slot.late,
+                }
+                for entry_id, slot in self._slots.items()
+            },
+        }
+
+
+def async_get_fleet(hass: HomeAssistant) -> FleetScheduler:
+    """The scheduler shared by all entries, created on first use."""
+    data: Dict[str, Any] = hass.data.setdefault(DOMAIN, {})
+    fleet: Optional[FleetScheduler] = data.get("fleet")
+    if fleet is None:
+        fleet = data["fleet"] = FleetScheduler(hass)
+    return fleet
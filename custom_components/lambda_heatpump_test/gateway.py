@@ -0,0 +1,322 @@
+"""One shared Modbus TCP connection per Lambda controller/gateway host.
+
+Lambda controllers (and the Modbus gateways in front of them) accept only a
+handful of TCP connections, so every config entry and unit ID that targets
+the same host goes through a single ModbusGateway. Requests are queued by
+(request priority, unit priority, fair ticket): within one priority the units
+take turns instead of one entry's refresh blocking the others. All gateways
+share the fleet's limit on transactions in flight (see fleet.py).
+"""
+from __future__ import annotations
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union
+import asyncio
+import itertools
+import logging
+import time
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.event import async_track_time_interval
+
+from pymodbus.exceptions import ConnectionException
+
+from .lambda_heatpump_test_api import (
+    DEFAULT_MAX_INFLIGHT,
+    DEFAULT_PORT,
+    DEFAULT_TIMEOUT,
+    TRANSPORT_ASYNC,
+    TRANSPORT_SYNC,
+    AsyncModbusClientManager,
+    AsyncPlanReader,
+    ModbusClientManager,
+)
+from .fleet import async_get_fleet
+from .health import BlockHealth
+from .latest_write import LatestWrite
+from .stats import ReadStats
+
+_LOGGER = logging.getLogger(__name__)
+DOMAIN = "lambda_heatpump_test"
+
+PRIORITY_WRITE = 0
+PRIORITY_POLL = 1
+PRIORITY_BACKGROUND = 2
+DEFAULT_UNIT_PRIORITY = 5
+KEEPALIVE_INTERVAL = 60
+
+Job = Callable[[ModbusClientManager], Union[Any, Awaitable[Any]]]
+
+
+class ModbusGateway:
+    """Owns the connection to one host and serializes access to it."""
+
+    def __init__(self, hass: HomeAssistant, host: str, transport: str = TRANSPORT_SYNC,
+                 timeout: float = DEFAULT_TIMEOUT, max_inflight: int = DEFAULT_MAX_INFLIGHT, port: int = DEFAULT_PORT):
+        self.hass = hass
+        self.host = host
+        self.key = f"{host}:{port}"
+        self.transport = transport
+        if transport == TRANSPORT_ASYNC:
+            self.manager: ModbusClientManager = AsyncModbusClientManager(
+                host, timeout=timeout, max_inflight=max_inflight, port=port)
+            workers = max(1, int(max_inflight))
+        else:
+            # the blocking client is not thread-safe: one executor job at a time
+            self.manager = ModbusClientManager(host, timeout=timeout, port=port)
+            workers = 1
+        self.users: Dict[str, int] = {}  # entry_id -> unit_id
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._seq = itertools.count()
+        self._tickets: Dict[int, int] = {}
+        self._served = 0
+        self._last_io = time.monotonic()
+        self._reconnect: Optional[asyncio.Task] = None
+        self._down = False  # last reconnect failed: jobs fail fast and the log stays quiet until the host is back
+        self._in_hand: Set[asyncio.Future] = set()
+        self.fleet = async_get_fleet(hass)
+        self._workers = [
+            hass.async_create_background_task(self._async_worker(), f"{DOMAIN} gateway {host} worker {i}")
+            for i in range(workers)
+        ]
+        self._unsub_keepalive = async_track_time_interval(
+            hass, self._async_keepalive, timedelta(seconds=KEEPALIVE_INTERVAL)
+        )
+
+    def _ticket(self, unit_id: int) -> int:
+        # a unit's next ticket starts no earlier than what is being served now,
+        # so an idle unit cannot bank turns and a busy one cannot hog the queue
+        ticket = max(self._tickets.get(unit_id, 0), self._served) + 1
+        self._tickets[unit_id] = ticket
+        return ticket
+
+    async def async_execute(self, unit_id: int, job: Job, priority: int = PRIORITY_POLL,
+                            unit_priority: int = DEFAULT_UNIT_PRIORITY, stats: Optional[ReadStats] = None,
+                            label: str = "") -> Any:
+        """Queue `job(manager)` and wait for its result.
+
+        With the sync transport the job runs in the executor, with the async
+        transport it must return an awaitable. With `stats`, queue/executor
+        wait and the job's own duration are recorded under `label`.
+        """
+        future = asyncio.get_running_loop().create_future()
+        key = (priority, unit_priority, self._ticket(unit_id), next(self._seq))
+        self._queue.put_nowait((key, future, job, stats, label, time.monotonic()))
+        return await future
+
+    async def async_read(self, unit_id: int, start_register: int, count: int,
+                         priority: int = PRIORITY_POLL, unit_priority: int = DEFAULT_UNIT_PRIORITY,
+                         stats: Optional[ReadStats] = None) -> List[int]:
+        if self.transport == TRANSPORT_ASYNC:
+            job = lambda manager: manager.async_read_u16_block(start_register, count, unit_id)  # noqa: E731
+        else:
+            job = lambda manager: manager.read_u16_block(start_register, count, unit_id)  # noqa: E731
+        return await self.async_execute(unit_id, job, priority, unit_priority, stats, f"{start_register}+{count}")
+
+    async def async_write(self, unit_id: int, address: int, values: List[int], read_start: int, read_count: int,
+                          unit_priority: int = DEFAULT_UNIT_PRIORITY, stats: Optional[ReadStats] = None) -> List[int]:
+        """Write and read back ahead of every queued poll; returns the read-back registers."""
+        if self.transport == TRANSPORT_ASYNC:
+            job = lambda manager: manager.async_write_read_registers(  # noqa: E731
+                address, values, read_start, read_count, unit_id)
+        else:
+            job = lambda manager: manager.write_read_registers(  # noqa: E731
+                address, values, read_start, read_count, unit_id)
+        return await self.async_execute(unit_id, job, PRIORITY_WRITE, unit_priority, stats,
+                                        f"write {address}+{len(values)}")
+
+    async def _async_worker(self) -> None:
+        while True:
+            key, future, job, stats, label, queued = await self._queue.get()
+            self._served = max(self._served, key[2])
+            if future.done():  # caller gave up
+                continue
+            # close() cancels the workers: the job a worker holds at that moment is failed there, not left hanging
+            self._in_hand.add(future)
+            try:
+                if self._reconnect is not None and not self._reconnect.done():
+                    await asyncio.wait({self._reconnect})
+                if self._down:
+                    # only the reconnect task connects: on a dead socket pymodbus would connect inside the job
+                    # as well and every refresh would cost two connect timeouts; this one triggers the next attempt
+                    err = ConnectionException(f"{self.host} is unreachable")
+                    future.set_exception(err)
+                    self._connection_lost(err)
+                    continue
+                waiting = time.monotonic()
+                await self.fleet.async_acquire()
+                self.fleet.transaction_wait.add(time.monotonic() - waiting)
+                if not self._queue.empty():
+                    # a write may have been queued while waiting for a transaction slot: it goes first
+                    self._queue.put_nowait((key, future, job, stats, label, queued))
+                    self._in_hand.discard(future)
+                    key, future, job, stats, label, queued = self._queue.get_nowait()
+                    self._in_hand.add(future)
+                    self._served = max(self._served, key[2])
+                    if future.done():
+                        self.fleet.release()
+                        continue
+                await self._async_run(future, job, stats, label, queued)
+            finally:
+                self._in_hand.discard(future)
+
+    async def _async_run(self, future: asyncio.Future, job: Job, stats: Optional[ReadStats],
+                         label: str, queued: float) -> None:
+        """Run one job holding a fleet transaction slot and settle its future."""
+        dequeued = time.monotonic()
+        started = dequeued
+        error: Optional[Exception] = None
+        try:
+            if self.transport == TRANSPORT_ASYNC:
+                result = await job(self.manager)
+            else:
+                result, started = await self.hass.async_add_executor_job(_timed, job, self.manager)
+        except Exception as err:
+            error = err
+            if not future.done():
+                future.set_exception(err)
+            if isinstance(err, ConnectionException):
+                self._connection_lost(err)
+        else:
+            self._down = False
+            if not future.done():
+                future.set_result(result)
+        finally:
+            self._last_io = time.monotonic()
+            self.fleet.release()
+        if stats is not None:
+            stats.queue_wait.add(dequeued - queued)
+            if self.transport != TRANSPORT_ASYNC and error is None:
+                stats.executor_wait.add(started - dequeued)
+            stats.record_request(label, self._last_io - started, error)
+
+    def _connection_lost(self, err: Exception) -> None:
+        """Fail everything queued (it would only fail one by one) and reconnect once."""
+        while not self._queue.empty():
+            future = self._queue.get_nowait()[1]
+            if not future.done():
+                future.set_exception(ConnectionException(f"connection to {self.host} lost: {err}"))
+        if self._reconnect is None or self._reconnect.done():
+            self._reconnect = self.hass.async_create_background_task(
+                self._async_reconnect(), f"{DOMAIN} gateway {self.host} reconnect")
+
+    async def _async_reconnect(self) -> None:
+        _LOGGER.log(logging.DEBUG if self._down else logging.INFO,
+                    "Lambda Heatpump Test: connection to %s lost, reconnecting", self.host)
+        try:
+            if self.transport == TRANSPORT_ASYNC:
+                self.manager.close()
+                connected = await self.manager.async_connect()
+            else:
+                connected = await self.hass.async_add_executor_job(self._reconnect_sync)
+        except Exception as err:
+            connected = False
+            _LOGGER.debug("Lambda Heatpump Test: reconnect to %s failed: %s", self.host, err)
+        if not connected and not self._down:
+            _LOGGER.warning("Lambda Heatpump Test: reconnect to %s failed, retrying with the next refresh", self.host)
+        self._down = not connected
+
+    def _reconnect_sync(self) -> bool:
+        self.manager.close()
+        return bool(self.manager.client.connect())
+
+    async def _async_keepalive(self, _now=None) -> None:
+        # keep the socket from being dropped by the controller between slow polls
+        if not self.users or time.monotonic() - self._last_io < KEEPALIVE_INTERVAL:
+            return
+        try:
+            await self.async_read(next(iter(self.users.values())), 0, 1, PRIORITY_BACKGROUND)
+        except Exception as err:
+            _LOGGER.debug("Lambda Heatpump Test: keepalive to %s failed: %s", self.host, err)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """State for the diagnostics download (without the host)."""
+        return {
+            "transport": self.transport,
+            "connected": bool(getattr(self.manager.client, "connected", False)),
+            "units": sorted(set(self.users.values())),
+            "workers": len(self._workers),
+            "queued": self._queue.qsize(),
+            "idle_s": round(time.monotonic() - self._last_io, 1),
+        }
+
+    def close(self) -> None:
+        self._unsub_keepalive()
+        if self._reconnect is not None:
+            self._reconnect.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        futures = list(self._in_hand)
+        while not self._queue.empty():
+            futures.append(self._queue.get_nowait()[1])
+        for future in futures:
+            if not future.done():
+                future.set_exception(ConnectionException(f"gateway {self.host} closed"))
+        self.manager.close()
+
+
+class GatewayClient(AsyncPlanReader):
+    """What a config entry sees: one unit ID on a shared gateway."""
+
+    def __init__(self, gateway: ModbusGateway, unit_id: int = 1, unit_priority: int = DEFAULT_UNIT_PRIORITY):
+        self.gateway = gateway
+        self.unit_id = unit_id
+        self.unit_priority = unit_priority
+        self.stats = ReadStats()
+        self.health = BlockHealth()
+        self._writes: Dict[int, LatestWrite] = {}
+
+    async def async_read_u16_block(self, start_register: int, count: int,
+                                   priority: int = PRIORITY_POLL) -> List[int]:
+        return await self.gateway.async_read(self.unit_id, start_register, count, priority,
+                                             self.unit_priority, self.stats)
+
+    async def async_write_read_registers(self, address: int, values: List[int],
+                                         read_start: int, read_count: int) -> List[int]:
+        """Write with read-back; writes to the same address that pile up are coalesced to the latest."""
+        writer = self._writes.get(address)
+        if writer is None:
+            writer = self._writes[address] = LatestWrite(
+                lambda values: self.gateway.async_write(self.unit_id, address, values, read_start, read_count,
+                                                        self.unit_priority, self.stats))
+        return await writer.async_write(values)
+
+
+def _timed(job: Job, manager: ModbusClientManager):
+    # runs in the executor; the start time tells how long the job waited for a thread
+    started = time.monotonic()
+    return job(manager), started
+
+
+def async_get_gateway(hass: HomeAssistant, entry: ConfigEntry) -> ModbusGateway:
+    """Gateway for the entry's host and port, created on first use."""
+    gateways: Dict[str, ModbusGateway] = hass.data.setdefault(DOMAIN, {}).setdefault("gateways", {})
+    host = entry.data["ip_address"]
+    port = entry.data.get("port", DEFAULT_PORT)
+    transport = entry.data.get("transport", TRANSPORT_SYNC)
+    gateway = gateways.get(f"{host}:{port}")
+    if gateway is None:
+        gateway = ModbusGateway(
+            hass, host, transport,
+            entry.data.get("timeout", DEFAULT_TIMEOUT),
+            entry.data.get("max_inflight", DEFAULT_MAX_INFLIGHT),
+            port,
+        )
+        gateways[gateway.key] = gateway
+    elif gateway.transport != transport:
+        _LOGGER.info("Lambda Heatpump Test: %s already connected with %s transport, sharing it",
+                     host, gateway.transport)
+    gateway.users[entry.entry_id] = entry.data.get("unit_id", 1)
+    return gateway
+
+
+def async_release_gateway(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Drop the entry from its gateway; the last one out closes the connection."""
+    gateways: Dict[str, ModbusGateway] = hass.data.get(DOMAIN, {}).get("gateways", {})
+    gateway: Optional[ModbusGateway] = gateways.get(f"{entry.data['ip_address']}:{entry.data.get('port', DEFAULT_PORT)}")
+    if gateway is None:
+        return
+    gateway.users.pop(entry.entry_id, None)
+    if not gateway.users:
+        gateways.pop(gateway.key, None)
+        gateway.close()
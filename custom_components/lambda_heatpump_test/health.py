@@ -0,0 +1,84 @@
+"""Per-block circuit breaker for register ranges that stop answering.
+
+After `threshold` consecutive failures a block is quarantined for a backoff
+that doubles on every failed retry (up to `max_backoff`). Once the backoff
+has expired the next refresh reads the block once; success closes the
+circuit, failure quarantines it again.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Dict, Optional
+import logging
+import time
+
+from .stats import ERROR_TIMEOUT
+
+_LOGGER = logging.getLogger(__name__)
+
+BREAKER_THRESHOLD = 2
+BREAKER_BACKOFF = 30
+BREAKER_MAX_BACKOFF = 1800
+
+
+class _Circuit:
+    __slots__ = ("failures", "kind", "backoff", "open_until")
+
+    def __init__(self):
+        self.failures = 0
+        self.kind: Optional[str] = None
+        self.backoff = 0.0
+        self.open_until = 0.0
+
+
+class BlockHealth:
+    """Consecutive failures and quarantine state per register block label ("start+count")."""
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, backoff: float = BREAKER_BACKOFF,
+                 max_backoff: float = BREAKER_MAX_BACKOFF, clock: Callable[[], float] = time.monotonic):
+        self.threshold = max(1, int(threshold))
+        self.base_backoff = backoff
+        self.max_backoff = max_backoff
+        self._clock = clock
+        self._circuits: Dict[str, _Circuit] = {}
+
+    def allow(self, label: str) -> bool:
+        """False while the block is quarantined."""
+        circuit = self._circuits.get(label)
+        return circuit is None or self._clock() >= circuit.open_until
+
+    def kind(self, label: str) -> Optional[str]:
+        """Error kind of the block's last failure (see stats.error_kind)."""
+        circuit = self._circuits.get(label)
+        return None if circuit is None else circuit.kind
+
+    def timed_out(self, label: str) -> bool:
+        return self.kind(label) == ERROR_TIMEOUT
+
+    def success(self, label: str) -> None:
+        circuit = self._circuits.pop(label, None)
+        if circuit is not None and circuit.backoff:
+            _LOGGER.info("Lambda Heatpump Test: registers %s answer again", label)
+
+    def failure(self, label: str, kind: str) -> None:
+        circuit = self._circuits.get(label)
+        if circuit is None:
+            circuit = self._circuits[label] = _Circuit()
+        circuit.failures += 1
+        circuit.kind = kind
+        if circuit.failures < self.threshold:
+            return
+        circuit.backoff = min(circuit.backoff * 2, self.max_backoff) if circuit.backoff else self.base_backoff
+        circuit.open_until = self._clock() + circuit.backoff
+        _LOGGER.info("Lambda Heatpump Test: registers %s quarantined for %ss after %d failures (%s)",
+                     label, circuit.backoff, circuit.failures, kind)
+
+    def as_dict(self) -> Dict[str, Any]:
+        now = self._clock()
+        return {
+            label: {
+                "failures": c.failures,
+                "kind": c.kind,
+                "backoff_s": c.backoff,
+                "retry_in_s": max(0.0, round(c.open_until - now, 1)),
+            }
+            for label, c in self._circuits.items()
+        }
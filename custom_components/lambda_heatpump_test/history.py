@@ -0,0 +1,156 @@
+"""High-resolution history of fast sensors, exported as hourly long-term statistics.
+
+Every refresh appends one row of raw register words to a fixed-size ring
+(one array('h') column per sensor plus an array('d') of timestamps), so a
+sample costs two bytes per sensor instead of a recorder state row. Hourly
+mean/min/max are accumulated on the fly and handed to the recorder as
+external statistics once an hour is complete.
+"""
+from __future__ import annotations
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import logging
+import math
+import re
+
+_LOGGER = logging.getLogger(__name__)
+
+DOMAIN = "lambda_heatpump_test"
+HISTORY_SPAN = 3 * 3600
+PERIOD = 3600
+# hours kept for export while the recorder is not available
+MAX_PENDING_HOURS = 48
+# int16 word marking a sample that was not read (uint16 32768 is indistinguishable from it)
+MISSING = -0x8000
+
+HourRow = Tuple[float, float, float, float]  # period start, mean, min, max
+
+
+def history_specs(specs: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Single-register numeric sensors; enums and 32-bit counters are left to the recorder."""
+    return [s for s in specs if isinstance(s.get("register"), int) and not s.get("description_map")]
+
+
+def statistic_id(entry_id: str, name: str) -> str:
+    slug = re.sub(r"_+", "_", re.sub(r"[^a-z0-9]", "_", f"{entry_id}_{name}".lower())).strip("_")
+    return f"{DOMAIN}:{slug}"
+
+
+class HistoryBuffer:
+    """Ring of raw int16 words per sensor with running hourly aggregates."""
+
+    def __init__(self, specs: Sequence[Dict[str, Any]], tick: float, span: float = HISTORY_SPAN):
+        self.specs = list(specs)
+        self.names = [s["name"] for s in self.specs]
+        self.scales = [s.get("scale") or 1 for s in self.specs]
+        self.unsigned = [s.get("data_type") == "uint16" for s in self.specs]
+        self.capacity = max(2, math.ceil(span / max(tick, 0.1)))
+        self.times = array("d", [0.0]) * self.capacity
+        self.words = [array("h", [MISSING]) * self.capacity for _ in self.specs]
+        self.head = 0
+        self.size = 0
+        self._period: Optional[float] = None
+        self._acc: List[List[float]] = [[0, 0.0, math.inf, -math.inf] for _ in self.specs]  # count, sum, min, max
+        self.pending: Dict[str, List[HourRow]] = {}
+        # hour in which the recorder refused an export; retried once the next hour is complete
+        self.export_failed: Optional[float] = None
+
+    def _value(self, col: int, word: int) -> float:
+        if self.unsigned[col] and word < 0:
+            word += 0x10000
+        return word * self.scales[col]
+
+    def append(self, now: float, raw: Dict[str, Optional[int]]) -> None:
+        """Add one row; `raw` holds the unscaled values read in this refresh."""
+        period = now - now % PERIOD
+        if self._period is not None and period != self._period:
+            self._close_period()
+        self._period = period
+        i = self.head
+        self.times[i] = now
+        for col, name in enumerate(self.names):
+            value = raw.get(name)
+            word = MISSING if value is None else ((int(value) + 0x8000) & 0xFFFF) - 0x8000
+            self.words[col][i] = word
+            if word != MISSING:
+                acc = self._acc[col]
+                scaled = self._value(col, word)
+                acc[0] += 1
+                acc[1] += scaled
+                if scaled < acc[2]:
+                    acc[2] = scaled
+                if scaled > acc[3]:
+                    acc[3] = scaled
+        self.head = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def _close_period(self) -> None:
+        for col, acc in enumerate(self._acc):
+            if acc[0]:
+                rows = self.pending.setdefault(self.names[col], [])
+                rows.append((self._period, round(acc[1] / acc[0], 4), round(acc[2], 4), round(acc[3], 4)))
+                del rows[:-MAX_PENDING_HOURS]
+            self._acc[col] = [0, 0.0, math.inf, -math.inf]
+
+    def series(self, name: str, last: Optional[int] = None) -> List[Tuple[float, Optional[float]]]:
+        """(timestamp, value) of one sensor, oldest first."""
+        col = self.names.index(name)
+        count = self.size if last is None else min(last, self.size)
+        start = (self.head - count) % self.capacity
+        out = []
+        for k in range(count):
+            i = (start + k) % self.capacity
+            word = self.words[col][i]
+            out.append((self.times[i], None if word == MISSING else self._value(col, word)))
+        return out
+
+    def as_dict(self, last: int = 60) -> Dict[str, Any]:
+        newest, oldest = self.times[(self.head - 1) % self.capacity], self.times[(self.head - self.size) % self.capacity]
+        return {
+            "capacity": self.capacity,
+            "rows": self.size,
+            "span_s": round(newest - oldest, 1) if self.size else 0,
+            "bytes": self.times.itemsize * self.capacity + sum(w.itemsize * self.capacity for w in self.words),
+            "pending_hours": {name: len(rows) for name, rows in self.pending.items()},
+            "last": {name: self.series(name, last) for name in self.names},
+        }
+
+
+def async_import_statistics(hass, entry_id: str, history: HistoryBuffer) -> None:
+    """Hand completed hours to the recorder as external statistics; kept pending until it took them."""
+    if not history.pending or history.export_failed == history._period or "recorder" not in hass.config.components:
+        return
+    from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+    from homeassistant.components.recorder.statistics import async_add_external_statistics
+    from homeassistant.exceptions import HomeAssistantError
+    from homeassistant.util import dt as dt_util
+    try:
+        from homeassistant.components.recorder.models import StatisticMeanType
+    except ImportError:  # before 2025.4
+        StatisticMeanType = None
+
+    units = {s["name"]: s.get("unit") or None for s in history.specs}
+    exported = 0
+    for name, rows in list(history.pending.items()):
+        metadata = StatisticMetaData(
+            has_mean=True,
+            has_sum=False,
+            name=f"{name} (hourly)",
+            source=DOMAIN,
+            statistic_id=statistic_id(entry_id, name),
+            unit_of_measurement=units.get(name),
+        )
+        if StatisticMeanType is not None:
+            metadata["mean_type"] = StatisticMeanType.ARITHMETIC
+        try:
+            async_add_external_statistics(hass, metadata, [
+                StatisticData(start=dt_util.utc_from_timestamp(start), mean=mean, min=low, max=high)
+                for start, mean, low, high in rows
+            ])
+        except HomeAssistantError as err:
+            _LOGGER.warning("Lambda Heatpump Test: hourly statistics of %s not exported, retrying next hour: %s", name, err)
+            history.export_failed = history._period
+            continue
+        del history.pending[name]
+        exported += 1
+    _LOGGER.debug("Lambda Heatpump Test: exported hourly statistics of %d sensors", exported)
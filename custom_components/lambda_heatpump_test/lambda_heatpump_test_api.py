@@ -1,16 +1,302 @@
 """API for communicating with Lambda Heatpump via Modbus TCP."""
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+import asyncio
+import inspect
+import logging
+
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
 from pymodbus.client import ModbusTcpClient
+from pymodbus.exceptions import ConnectionException, ModbusIOException
+try:
+    from pymodbus.client import AsyncModbusTcpClient
+except ImportError:  # pymodbus 2.x has no asyncio client with this API
+    AsyncModbusTcpClient = None
+try:
+    from pymodbus.version import version as pymodbus_version
+except Exception:
+    import pymodbus as _pm
+    pymodbus_version = getattr(_pm, '__version__', 'unknown')
+
+from .read_plan import ReadBlock
+from .health import BlockHealth
+from .stats import ERROR_TIMEOUT, ReadStats, error_kind
+
+_LOGGER = logging.getLogger(__name__)
+
+TRANSPORT_SYNC = "sync"
+TRANSPORT_ASYNC = "async"
+DEFAULT_PORT = 502
+DEFAULT_TIMEOUT = 3
+DEFAULT_MAX_INFLIGHT = 1
+
+def _unit_kwarg(method) -> str:
+    """Name of the unit/slave keyword of a pymodbus request method.
+
+    pymodbus renamed it from `unit` (2.x) to `slave` (3.0) to `device_id`
+    (3.10), and several 3.x releases swallow unknown keywords via **kwargs,
+    so probing by TypeError alone can silently address unit 0.
+    """
+    try:
+        params = inspect.signature(method).parameters
+    except (TypeError, ValueError):
+        return "unit"
+    for name in ("device_id", "slave", "unit"):
+        if name in params:
+            return name
+    return "unit"
+
+
+class ModbusClientManager:
+    def __init__(self, ip_address: str, word_order: str = "big", unit_id: int = 1, timeout: float = DEFAULT_TIMEOUT,
+                 port: int = DEFAULT_PORT):
+        self.ip_address = ip_address
+        self.port = port
+        self.timeout = timeout
+        self.client = self._create_client()
+        self.word_order = word_order
+        self.unit_id = unit_id
+        self._unit_kws: Dict[str, str] = {}
+        self._fc23: Optional[bool] = None  # read/write multiple registers; None = not tried yet
+        _LOGGER.info("Lambda Heatpump Test: using pymodbus %s, word_order=%s, unit_id=%s", pymodbus_version, word_order, unit_id)
+
+    def _create_client(self):
+        # no pymodbus retries: a dead block would cost (retries + 1) x timeout on the one gateway worker,
+        # retrying is up to the block breaker
+        return ModbusTcpClient(self.ip_address, port=self.port, timeout=self.timeout, retries=0)
+
+    def connect(self):
+        self.client.connect()
+
+    def close(self):
+        try:
+            self.client.close()
+        except Exception:
+            pass
+
+    def _call(self, name: str, unit_id: Optional[int], *args, **kwargs):
+        # Support different pymodbus kwarg names across versions; returns the
+        # response (sync client) or an awaitable (asyncio client)
+        method = getattr(self.client, name)
+        unit_kw = self._unit_kws.get(name)
+        if unit_kw is None:
+            unit_kw = self._unit_kws[name] = _unit_kwarg(method)
+        kwargs[unit_kw] = self.unit_id if unit_id is None else unit_id
+        return method(*args, **kwargs)
+
+    def _read_holding(self, start_register: int, count: int, unit_id: Optional[int] = None):
+        return self._call("read_holding_registers", unit_id, start_register, count=count)
+
+    def _write_holding(self, address: int, values: List[int], unit_id: Optional[int] = None):
+        return self._call("write_registers", unit_id, address, values)
+
+    def _readwrite_holding(self, address: int, values: List[int], read_start: int, read_count: int,
+                           unit_id: Optional[int] = None):
+        # pymodbus 2.x calls the values `write_registers`
+        params = inspect.signature(self.client.readwrite_registers).parameters
+        values_kw = "values" if "values" in params else "write_registers"
+        return self._call("readwrite_registers", unit_id, read_address=read_start, read_count=read_count,
+                          write_address=address, **{values_kw: values})
+
+    @staticmethod
+    def _check(rr, what: str) -> None:
+        if isinstance(rr, ModbusIOException):  # no (valid) answer, i.e. a timeout
+            raise rr
+        if getattr(rr, "isError", lambda: False)():
+            raise UpdateFailed(f"Modbus error {what}: {rr}")
+
+    @classmethod
+    def _registers(cls, rr, start_register: int, count: int) -> List[int]:
+        cls._check(rr, f"reading {start_register}+{count}")
+        return rr.registers
+
+    def _fc23_answer(self, rr) -> bool:
+        """False (and remembered) if the device rejects FC23 as an illegal function."""
+        if getattr(rr, "exception_code", None) == 1:
+            _LOGGER.info("Lambda Heatpump Test: %s does not support read/write multiple registers, "
+                         "writing and reading back separately", self.ip_address)
+            self._fc23 = False
+            return False
+        if not getattr(rr, "isError", lambda: False)():
+            self._fc23 = True
+        return True
+
+    def read_u16_block(self, start_register: int, count: int, unit_id: Optional[int] = None):
+        return self._registers(self._read_holding(start_register, count, unit_id), start_register, count)
+
+    def write_read_registers(self, address: int, values: List[int], read_start: int, read_count: int,
+                             unit_id: Optional[int] = None) -> List[int]:
+        """Write `values` at `address` and return the registers read back from `read_start`.
+
+        Uses one read/write multiple registers transaction (FC23) where the
+        device supports it, otherwise a write multiple (FC16) plus a read.
+        """
+        if self._fc23 is not False:
+            rr = self._readwrite_holding(address, values, read_start, read_count, unit_id)
+            if self._fc23_answer(rr):
+                return self._registers(rr, read_start, read_count)
+        self._check(self._write_holding(address, values, unit_id), f"writing {address}")
+        return self.read_u16_block(read_start, read_count, unit_id)
+
+
+class AsyncPlanReader:
+    """Plan reading on top of an awaitable `async_read_u16_block(start, count)`.
+
+    Blocks are read concurrently; how many requests actually hit the wire at
+    once is up to the implementation of `async_read_u16_block`.
+
+    With `health` set, blocks that keep failing are skipped while quarantined.
+    A block the device rejects falls back to per-sensor reads, but one that
+    timed out does not: its sensors would only time out one by one. A lost
+    connection cancels the remaining reads and is raised to the caller.
+    """
+
+    # request statistics and block circuit breaker, if the implementation keeps them
+    stats: Optional[ReadStats] = None
+    health: Optional[BlockHealth] = None
+
+    async def async_read_u16_block(self, start_register: int, count: int) -> List[int]:
+        raise NotImplementedError
+
+    async def async_write_read_registers(self, address: int, values: List[int],
+                                         read_start: int, read_count: int) -> List[int]:
+        raise NotImplementedError
+
+    async def async_read_block(self, block: ReadBlock, data: Dict[str, Any], raw: Optional[Dict[str, int]] = None) -> None:
+        block.decode_into(await self.async_read_u16_block(block.start, block.count), data, raw)
+
+    @staticmethod
+    def _mark_failed(block: ReadBlock, data: Dict[str, Any], raw: Dict[str, int]) -> None:
+        for spec in block.specs:
+            data.setdefault(spec["name"], None)
+            raw.setdefault(spec["name"], None)
+
+    async def _async_read_guarded(self, block: ReadBlock, data: Dict[str, Any], raw: Dict[str, int]) -> None:
+        health = self.health
+        label = f"{block.start}+{block.count}"
+        if health is not None and not health.allow(label):
+            if len(block.specs) == 1 or health.timed_out(label):
+                self._mark_failed(block, data, raw)
+                return
+        else:
+            try:
+                await self.async_read_block(block, data, raw)
+            except ConnectionException:
+                raise
+            except Exception as block_err:
+                kind = error_kind(block_err)
+                if health is not None:
+                    health.failure(label, kind)
+                if len(block.specs) == 1 or kind == ERROR_TIMEOUT:
+                    _LOGGER.debug("Read of %s failed: %s", block, block_err)
+                    self._mark_failed(block, data, raw)
+                    return
+                _LOGGER.debug("Block read %s failed, falling back to single reads: %s", block, block_err)
+            else:
+                if health is not None:
+                    health.success(label)
+                return
+        # the device may reject reads spanning unmapped registers
+        for single in block.split():
+            await self._async_read_guarded(single, data, raw)
+
+    async def async_read_plan(self, plan: List[ReadBlock], raw: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        data: Dict[str, Any] = {}
+        if raw is None:
+            raw = {}
+        tasks = [asyncio.ensure_future(self._async_read_guarded(block, data, raw)) for block in plan]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        return data
+
+    async def async_probe_registers(self, registers: List[int]) -> List[int]:
+        results = await asyncio.gather(*(self.async_read_u16_block(reg, 1) for reg in registers),
+                                       return_exceptions=True)
+        for result in results:
+            if isinstance(result, ConnectionException):
+                raise result
+        return [reg for reg, result in zip(registers, results) if not isinstance(result, BaseException)]
+
+
+class AsyncModbusClientManager(AsyncPlanReader, ModbusClientManager):
+    """Same register API on top of pymodbus' asyncio client.
+
+    Reads are awaited on the event loop instead of going through the executor.
+    `max_inflight` bounds concurrent transactions; keep it at 1 unless the
+    device/gateway is known to handle pipelined requests.
+    """
+
+    def __init__(self, ip_address: str, word_order: str = "big", unit_id: int = 1,
+                 timeout: float = DEFAULT_TIMEOUT, max_inflight: int = DEFAULT_MAX_INFLIGHT, port: int = DEFAULT_PORT):
+        if AsyncModbusTcpClient is None:
+            raise UpdateFailed(f"pymodbus {pymodbus_version} has no asyncio TCP client")
+        super().__init__(ip_address, word_order, unit_id, timeout, port)
+        self._inflight = asyncio.Semaphore(max(1, int(max_inflight)))
+        self._connect_lock = asyncio.Lock()
+
+    def _create_client(self):
+        # pymodbus reconnects on its own with exponential backoff up to reconnect_delay_max
+        return AsyncModbusTcpClient(self.ip_address, port=self.port, timeout=self.timeout, retries=0,
+                                    reconnect_delay=1, reconnect_delay_max=60)
+
+    def connect(self):
+        raise RuntimeError("use async_connect() with the asyncio transport")
+
+    async def async_connect(self) -> bool:
+        async with self._connect_lock:
+            if not self.client.connected:
+                await asyncio.wait_for(self.client.connect(), self.timeout)
+            return self.client.connected
+
+    async def async_read_u16_block(self, start_register: int, count: int, unit_id: Optional[int] = None) -> List[int]:
+        async with self._inflight:
+            if not self.client.connected:
+                await self.async_connect()
+            rr = await asyncio.wait_for(self._read_holding(start_register, count, unit_id), self.timeout)
+        return self._registers(rr, start_register, count)
+
+    async def async_write_read_registers(self, address: int, values: List[int], read_start: int, read_count: int,
+                                         unit_id: Optional[int] = None) -> List[int]:
+        async with self._inflight:
+            if not self.client.connected:
+                await self.async_connect()
+            if self._fc23 is not False:
+                rr = await asyncio.wait_for(
+                    self._readwrite_holding(address, values, read_start, read_count, unit_id), self.timeout)
+                if self._fc23_answer(rr):
+                    return self._registers(rr, read_start, read_count)
+            rr = await asyncio.wait_for(self._write_holding(address, values, unit_id), self.timeout)
+            self._check(rr, f"writing {address}")
+            rr = await asyncio.wait_for(self._read_holding(read_start, read_count, unit_id), self.timeout)
+        return self._registers(rr, read_start, read_count)
+
+
+async def detect_lambda_model(ip_address: str, port: int = DEFAULT_PORT, unit_id: int = 1,
+                              timeout: float = DEFAULT_TIMEOUT) -> Optional[str]:
+    """Detect the Lambda Heatpump model.
+
+    The blocking client runs in the default executor so the event loop is
+    never held up by a slow or offline device.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        None, _detect_lambda_model, ip_address, port, unit_id, timeout)
+
 
-async def detect_lambda_model(ip_address):
-    """Detect the Lambda Heatpump model."""
-    client = ModbusTcpClient(ip_address)
+def _detect_lambda_model(ip_address: str, port: int, unit_id: int, timeout: float) -> Optional[str]:
+    manager = ModbusClientManager(ip_address, unit_id=unit_id, timeout=timeout, port=port)
     try:
         # Beispiel: Lese ein spezifisches Register, um das Modell zu identifizieren
         model_register = 1000  # Ersetze dies durch das tatsächliche Register
-        # result = client.read_holding_registers(model_register, 1)
-        result = client.read_holding_registers(model_register, count=1, device_id=1)
-        if result.isError():
+        try:
+            registers = manager.read_u16_block(model_register, 1)
+        except Exception as err:
+            _LOGGER.debug("Lambda Heatpump Test: model detection on %s failed: %s", ip_address, err)
             return None
-        return f"Model {result.registers[0]}"
+        return f"Model {registers[0]}"
     finally:
-        client.close()
+        manager.close()
@@ -0,0 +1,36 @@
+"""Write coalescing for setpoints that may change faster than the device takes them (PV surplus control)."""
+from __future__ import annotations
+from typing import Awaitable, Callable, List, Optional, Tuple
+import asyncio
+
+
+class LatestWrite:
+    """At most one write in flight; a value superseded before it was sent is never sent.
+
+    Callers whose value got superseded receive the read-back of the newer write.
+    """
+
+    def __init__(self, send: Callable[[List[int]], Awaitable[List[int]]]):
+        self._send = send
+        self._pending: Optional[Tuple[List[int], asyncio.Future]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def async_write(self, values: List[int]) -> List[int]:
+        loop = asyncio.get_running_loop()
+        future = self._pending[1] if self._pending is not None else loop.create_future()
+        self._pending = (values, future)
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._async_drain())
+        return await asyncio.shield(future)
+
+    async def _async_drain(self) -> None:
+        while self._pending is not None:
+            (values, future), self._pending = self._pending, None
+            try:
+                result = await self._send(values)
+            except Exception as err:
+                if not future.done():
+                    future.set_exception(err)
+            else:
+                if not future.done():
+                    future.set_result(result)
@@ -0,0 +1,43 @@
+from __future__ import annotations
+from typing import Any, Dict
+import logging
+
+from homeassistant.components.number import NumberEntity, NumberMode
+from homeassistant.core import HomeAssistant
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from . import entry_device_info
+from .registers import NUMBERS
+
+_LOGGER = logging.getLogger(__name__)
+DOMAIN = "lambda_heatpump_test"
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    device_info = entry_device_info(entry)
+    async_add_entities([LambdaNumber(coordinator, spec, device_info, entry.entry_id) for spec in NUMBERS])
+
+class LambdaNumber(CoordinatorEntity, NumberEntity):
+    """Writable register; the value shown is the read-back of the last write or refresh."""
+    _attr_has_entity_name = True
+    _attr_mode = NumberMode.BOX
+
+    def __init__(self, coordinator, spec: Dict[str, Any], device_info: DeviceInfo, entry_id: str):
+        super().__init__(coordinator)
+        self._spec = spec
+        self._attr_unique_id = f"lambda_heatpump_test_{entry_id}_{spec['key']}"
+        self._attr_name = spec["name"]
+        self._attr_native_unit_of_measurement = spec.get("unit")
+        self._attr_native_min_value = spec["min"]
+        self._attr_native_max_value = spec["max"]
+        self._attr_native_step = spec.get("step", 1)
+        self._attr_device_info = device_info
+
+    @property
+    def native_value(self):
+        return (self.coordinator.data or {}).get(self._spec["name"])
+
+    async def async_set_native_value(self, value: float) -> None:
+        await self.coordinator.async_write_number(self._spec, value)
@@ -0,0 +1,81 @@
+"""Compile the SENSORS register map into a small set of Modbus block reads."""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .decoder import BlockDecoder
+
+# Modbus allows at most 125 holding registers per request
+MODBUS_MAX_BLOCK = 125
+DEFAULT_MAX_GAP = 4
+DEFAULT_MAX_BLOCK = 64
+
+
+def spec_registers(spec: Dict[str, Any]) -> Tuple[int, int]:
+    """Return (first register, register count) covered by a sensor spec."""
+    reg = spec.get("register")
+    if isinstance(reg, list) and len(reg) == 2:
+        return min(reg), 2
+    if isinstance(reg, int):
+        return reg, 1
+    raise ValueError(f"Unsupported register spec: {reg}")
+
+
+@dataclass
+class ReadBlock:
+    """One read_holding_registers request and the sensors decoded from it."""
+    start: int
+    count: int
+    specs: List[Dict[str, Any]] = field(default_factory=list)
+    word_order: str = "big"
+    decoder: Optional[BlockDecoder] = field(default=None, repr=False, compare=False)
+    _singles: Optional[List["ReadBlock"]] = field(default=None, repr=False, compare=False)
+
+    @property
+    def end(self) -> int:
+        return self.start + self.count
+
+    def compile(self) -> "ReadBlock":
+        self.decoder = BlockDecoder(self.start, self.count, self.specs, self.word_order)
+        return self
+
+    def decode_into(self, registers: List[int], data: Dict[str, Any],
+                    raw: Optional[Dict[str, int]] = None) -> None:
+        if self.decoder is None:
+            self.compile()
+        self.decoder.decode_into(registers, data, raw)
+
+    def split(self) -> List["ReadBlock"]:
+        """Per-sensor blocks, used when the device rejects a coalesced read."""
+        if self._singles is None:
+            self._singles = [ReadBlock(*spec_registers(s), [s], self.word_order).compile() for s in self.specs]
+        return self._singles
+
+    def __repr__(self) -> str:
+        return f"ReadBlock({self.start}+{self.count}, {len(self.specs)} sensors)"
+
+
+def build_read_plan(
+    specs: Sequence[Dict[str, Any]],
+    max_gap: int = DEFAULT_MAX_GAP,
+    max_block: int = DEFAULT_MAX_BLOCK,
+    word_order: str = "big",
+) -> List[ReadBlock]:
+    """Group specs into contiguous blocks and compile their decoders.
+
+    Two sensors share a block when at most `max_gap` unused registers lie
+    between them and the resulting block stays within `max_block` registers.
+    """
+    max_gap = max(0, int(max_gap))
+    max_block = max(2, min(int(max_block), MODBUS_MAX_BLOCK))
+    blocks: List[ReadBlock] = []
+    for spec in sorted(specs, key=lambda s: spec_registers(s)[0]):
+        start, count = spec_registers(spec)
+        end = start + count
+        cur = blocks[-1] if blocks else None
+        if cur is not None and start - cur.end <= max_gap and max(end, cur.end) - cur.start <= max_block:
+            cur.count = max(end, cur.end) - cur.start
+            cur.specs.append(spec)
+        else:
+            blocks.append(ReadBlock(start, count, [spec], word_order))
+    return [block.compile() for block in blocks]
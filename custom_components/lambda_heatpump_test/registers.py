@@ -0,0 +1,215 @@
+"""Lambda Modbus register map: general registers plus templates per module type.
+
+Modules of one type are laid out every 100 registers (heat pump 1 at 1000,
+heat pump 2 at 1100, ...); template registers are offsets from the module
+base. Lambda register index 1 (ambient/E-Manager) has no instances.
+"""
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+TIER_FAST = "fast"
+TIER_NORMAL = "normal"
+TIER_SLOW = "slow"
+TIERS = (TIER_FAST, TIER_NORMAL, TIER_SLOW)
+
+MODULE_STRIDE = 100
+
+# ---- Embedded SENSORS from original integration ----
+GENERAL_SENSORS: List[Dict[str, Any]] = [
+    # General Ambient
+    {"name": "Ambient Error Number", "register": 0, "unit": "", "scale": 1, "precision": 0, "data_type": "int16", "tier": TIER_SLOW, "state_class": "total"},
+    {"name": "Ambient Operating State", "register": 1, "unit": "", "scale": 1, "precision": 0, "data_type": "uint16", "state_class": "total",
+     "description_map": ["Off", "Automatik", "Manual", "Error"]},
+    {"name": "Ambient Temperature", "register": 2, "unit": "°C", "scale": 0.1, "precision": 1, "data_type": "int16", "device_class": "temperature", "state_class": "measurement"},
+    {"name": "Ambient Temperature 1h", "register": 3, "unit": "°C", "scale": 0.1, "precision": 1, "data_type": "int16", "device_class": "temperature", "state_class": "measurement"},
+    {"name": "Ambient Temperature Calculated", "register": 4, "unit": "°C", "scale": 0.1, "precision": 1, "data_type": "int16", "device_class": "temperature", "state_class": "measurement"},
+
+    # General E-Manager
+    {"name": "E-Manager Error Number", "register": 100, "unit": "", "scale": 1, "precision": 0, "data_type": "int16", "tier": TIER_SLOW, "state_class": "total"},
+    {"name": "E-Manager Operating State", "register": 101, "unit": "", "scale": 1, "precision": 0, "data_type": "uint16", "state_class": "total",
+     "description_map": ["Off", "Automatik", "Manual", "Error", "Offline"]},
+    {"name": "E-Manager Actual Power", "register": 102, "unit": "W", "scale": 1, "precision": 0, "data_type": "int16", "tier": TIER_FAST, "state_class": "total"},
+    {"name": "E-Manager Actual Power Consumption", "register": 103, "unit": "W", "scale": 1, "precision": 0, "data_type": "int16", "tier": TIER_FAST, "state_class": "total"},
+    {"name": "E-Manager Power Consumption Setpoint", "register": 104, "unit": "W", "scale": 1, "precision": 0, "data_type": "int16", "state_class": "total"},
+]
+
+# Writable registers (number entities and the write_setpoint service). "name" is the sensor
+# holding the current value, "readback" the block read back in the same transaction.
+NUMBERS: List[Dict[str, Any]] = [
+    {"key": "e_manager_power_consumption_setpoint", "name": "E-Manager Power Consumption Setpoint", "register": 104,
+     "unit": "W", "scale": 1, "data_type": "int16", "min": -32768, "max": 32767, "step": 1, "readback": [100, 5]},
+]
+
+HEAT_PUMP_SENSORS: List[Dict[str, Any]] = [
+    {"name": "Error State", "register": 0, "unit": "", "scale": 1, "precision": 0, "data_type": "uint16", "state_class": "total",
+     "description_map": ["OK", "Message", "Warnung", "Alarm", "Fault"]},
+    {"name": "Error Number", "register": 1, "unit": "", "scale": 1, "precision": 0, "data_type": "int16", "tier": TIER_SLOW, "state_class": "total"},
+    {"name": "State", "register": 2, "unit": "", "scale": 1, "precision": 0, "data_type": "uint16", "state_class": "total",
+     "description_map": ["Init", "Reference", "Restart-Block", "Ready", "Start Pumps", "Start Compressor", "Pre-Regulation", "Regulation",
+                         "Not Used", "Cooling", "Defrosting", "Not Used", "Not Used", "Not Used", "Not Used", "Not Used", "Not Used",
+                         "Not Used", "Not Used", "Not Used", "Stopping", "Not Used", "Not Used", "Not Used", "Not Used", "Not Used",
+                         "Not Used", "Not Used", "Not Used", "Not Used", "Not Used", "Fault-Lock", "Alarm-Block", "Not Used", "Not Used",
+                         "Not Used", "Not Used", "Not Used", "Not Used", "Error-Reset"]},
+    {"name": "Operating State", "register": 3, "unit": "", "scale": 1, "precision": 0, "data_type": "uint16", "state_class": "total",
+     "description_map": ["Standby", "Central Heating", "Domestic Hot Water", "Cold Climate", "Circulate", "Defrost", "Off", "Frost",
+                         "Standby-Frost", "Not used", "Summer", "Holiday", "Error", "Warning", "Info-Message", "Time-Block", "Release-Block",
+                         "Mintemp-Block", "Firmware-Download"]},
+    {"name": "Flow Line Temperature", "register": 4, "unit": "°C", "scale": 0.01, "precision": 1, "data_type": "int16", "device_class": "temperature", "tier": TIER_FAST, "state_class": "measurement"},
+    {"name": "Return Line Temperature", "register": 5, "unit": "°C", "scale": 0.01, "precision": 1, "data_type": "int16", "device_class": "temperature", "tier": TIER_FAST, "state_class": "measurement"},
+    {"name": "Volume Flow Heat Sink", "register": 6, "unit": "l/h", "scale": 1, "precision": 1, "data_type": "int16", "tier": TIER_FAST, "state_class": "total"},
+    {"name": "Energy Source Inlet Temperature", "register": 7, "unit": "°C", "scale": 0.01, "precision": 1, "data_type": "int16", "device_class": "temperature", "state_class": "measurement"},
+    {"name": "Energy Source Outlet Temperature", "register": 8, "unit": "°C", "scale": 0.01, "precision": 1, "data_type": "int16", "device_class": "temperature", "state_class": "measurement"},
+    {"name": "Volume Flow Energy Source", "register": 9, "unit": "l/min", "scale": 0.01, "precision": 1, "data_type": "int16", "state_class": "measurement"},
+    {"name": "Compressor Unit Rating", "register": 10, "unit": "%", "scale": 0.01, "precision": 0, "data_type": "uint16", "tier": TIER_FAST, "state_class": "total"},
+    {"name": "Actual Heating Capacity", "register": 11, "unit": "kW", "scale": 0.1, "precision": 1, "data_type": "int16", "tier": TIER_FAST, "state_class": "measurement"},
+    {"name": "Inverter Power Consumption", "register": 12, "unit": "W", "scale": 1, "precision": 0, "data_type": "int16", "tier": TIER_FAST, "state_class": "total"},
+    {"name": "COP", "register": 13, "unit": "", "scale": 0.01, "precision": 2, "data_type": "int16", "tier": TIER_FAST, "state_class": "total"},
+    {"name": "Request Type", "register": 15, "unit": "", "scale": 1, "precision": 0, "data_type": "int16", "state_class": "total",
+     "description_map": ["No Request", "Flow Pump Circulation", "Central Heating", "Central Cooling", "Domestic Hot Water"]},
+    {"name": "Requested Flow Line Temperature", "register": 16, "unit": "°C", "scale": 0.1, "precision": 1, "data_type": "int16", "device_class": "temperature", "state_class": "measurement"},
+    {"name": "Requested Return Line Temperature", "register": 17, "unit": "°C", "scale": 0.1, "precision": 1, "data_type": "int16", "device_class": "temperature", "state_class": "measurement"},
+    {"name": "Requested Flow to Return Line Temperature Difference", "register": 18, "unit": "°C", "scale": 0.1, "precision": 1, "data_type": "int16", "device_class": "temperature", "state_class": "measurement"},
+    {"name": "Relais State 2nd Heating Stage", "register": 19, "unit": "", "scale": 1, "precision": 0, "data_type": "int16", "state_class": "total"},
+    {"name": "Compressor Power Consumption Accumulated", "register": [20, 21], "unit": "Wh", "scale": 1, "precision": 0, "data_type": "int32", "device_class": "energy", "tier": TIER_SLOW, "state_class": "total_increasing"},
+    {"name": "Compressor Thermal Energy Output Accumulated", "register": [22, 23], "unit": "Wh", "scale": 1, "precision": 0, "data_type": "int32", "device_class": "energy", "tier": TIER_SLOW, "state_class": "total_increasing"},
+]
+
+BOILER_SENSORS: List[Dict[str, Any]] = [
+    {"name": "Error Number", "register": 0, "unit": "", "scale": 1, "precision": 0, "data_type": "int16", "tier": TIER_SLOW, "state_class": "total"},
+    {"name": "Operating State", "register": 1, "unit": "", "scale": 1, "precision": 0, "data_type": "uint16", "state_class": "total",
+     "description_map": ["Standby", "Domestic Hot Water", "Legio", "Summer", "Frost", "Holiday", "Prio-Stop", "Error", "Off", "Prompt-DHW",
+                         "Trailing-Stop", "Temp-Lock", "Standby-Frost"]},
+    {"name": "Actual High Temperature", "register": 2, "unit": "°C", "scale": 0.1, "precision": 1, "data_type": "int16", "device_class": "temperature", "state_class": "measurement"},
+    {"name": "Actual Low Temperature", "register": 3, "unit": "°C", "scale": 0.1, "precision": 1, "data_type": "int16", "device_class": "temperature", "state_class": "measurement"},
+    {"name": "Set Temperature", "register": 50, "unit": "°C", "scale": 0.1, "precision": 1, "data_type": "int16", "device_class": "temperature", "tier": TIER_SLOW, "state_class": "measurement"},
+]
+
+BUFFER_SENSORS: List[Dict[str, Any]] = [
+    {"name": "Error Number", "register": 0, "unit": "", "scale": 1, "precision": 0, "data_type": "int16", "tier": TIER_SLOW, "state_class": "total"},
+    {"name": "Operating State", "register": 1, "unit": "", "scale": 1, "precision": 0, "data_type": "uint16", "state_class": "total",
+     "description_map": ["Standby", "Heating", "Cooling", "Summer", "Frost", "Holiday", "Prio-Stop", "Error", "Off", "Standby-Frost"]},
+    {"name": "Actual High Temperature", "register": 2, "unit": "°C", "scale": 0.1, "precision": 1, "data_type": "int16", "device_class": "temperature", "state_class": "measurement"},
+    {"name": "Actual Low Temperature", "register": 3, "unit": "°C", "scale": 0.1, "precision": 1, "data_type": "int16", "device_class": "temperature", "state_class": "measurement"},
+    {"name": "Set Temperature", "register": 50, "unit": "°C", "scale": 0.1, "precision": 1, "data_type": "int16", "device_class": "temperature", "tier": TIER_SLOW, "state_class": "measurement"},
+]
+
+SOLAR_SENSORS: List[Dict[str, Any]] = [
+    {"name": "Error Number", "register": 0, "unit": "", "scale": 1, "precision": 0, "data_type": "int16", "state_class": "total"},
+    {"name": "Operating State", "register": 1, "unit": "", "scale": 1, "precision": 0, "data_type": "uint16", "state_class": "total",
+     "description_map": ["Standby", "Heating", "Error", "Off"]},
+    {"name": "Actual Collector Temperature", "register": 2, "unit": "°C", "scale": 0.1, "precision": 1, "data_type": "int16", "device_class": "temperature", "state_class": "measurement"},
+    {"name": "Actual Buffer Sensor 1 Temperature", "register": 3, "unit": "°C", "scale": 0.1, "precision": 1, "data_type": "int16", "device_class": "temperature", "state_class": "measurement"},
+    {"name": "Actual Buffer Sensor 2 Temperature", "register": 4, "unit": "°C", "scale": 0.1, "precision": 1, "data_type": "int16", "device_class": "temperature", "state_class": "measurement"},
+    {"name": "Set Max Buffer Temperature", "register": 50, "unit": "°C", "scale": 0.1, "precision": 1, "data_type": "int16", "device_class": "temperature", "tier": TIER_SLOW, "state_class": "measurement"},
+    {"name": "Set Buffer Changeover Temperature", "register": 51, "unit": "°C", "scale": 0.1, "precision": 1, "data_type": "int16", "device_class": "temperature", "tier": TIER_SLOW, "state_class": "measurement"},
+]
+
+HEATING_CIRCUIT_SENSORS: List[Dict[str, Any]] = [
+    {"name": "Error Number", "register": 0, "unit": "", "scale": 1, "precision": 0, "data_type": "int16", "tier": TIER_SLOW, "state_class": "total"},
+    {"name": "Operating State", "register": 1, "unit": "", "scale": 1, "precision": 0, "data_type": "uint16", "state_class": "total",
+     "description_map": ["Heating", "Eco", "Cooling", "Floor-dry", "Frost", "Max-Temp", "Error", "Service", "Holiday", "Central Heating Summer",
+                         "Central Cooling Winter", "Prio-Stop", "Off", "Release-Off", "Time-Off", "Standby", "Standby-Heating", "Standby-Eco",
+                         "Standby-Cooling", "Standby-Frost", "Standby-Floor-dry"]},
+    {"name": "Flow Line Temperature", "register": 2, "unit": "°C", "scale": 0.1, "precision": 1, "data_type": "int16", "device_class": "temperature", "state_class": "measurement"},
+    {"name": "Return Line Temperature", "register": 3, "unit": "°C", "scale": 0.1, "precision": 1, "data_type": "int16", "device_class": "temperature", "state_class": "measurement"},
+    {"name": "Room Device Temperature", "register": 4, "unit": "°C", "scale": 0.1, "precision": 1, "data_type": "int16", "device_class": "temperature", "state_class": "measurement"},
+    {"name": "Set Flow Line Temperature", "register": 5, "unit": "°C", "scale": 0.1, "precision": 1, "data_type": "int16", "device_class": "temperature", "state_class": "measurement"},
+    {"name": "Operating Mode", "register": 6, "unit": "", "scale": 1, "precision": 0, "data_type": "int16", "tier": TIER_SLOW, "state_class": "total",
+     "description_map": ["Off", "Manual", "Automatik", "Auto-Heating", "Auto-Cooling", "Frost", "Summer", "Floor-dry"]},
+    {"name": "Set Flow Line Offset Temperature", "register": 50, "unit": "°C", "scale": 0.1, "precision": 1, "data_type": "int16", "device_class": "temperature", "tier": TIER_SLOW, "state_class": "measurement"},
+    {"name": "Set Heating Mode Room Temperature", "register": 51, "unit": "°C", "scale": 0.1, "precision": 1, "data_type": "int16", "device_class": "temperature", "tier": TIER_SLOW, "state_class": "measurement"},
+    {"name": "Set Cooling Mode Room Temperature", "register": 52, "unit": "°C", "scale": 0.1, "precision": 1, "data_type": "int16", "device_class": "temperature", "tier": TIER_SLOW, "state_class": "measurement"},
+]
+
+# Lambda supports up to 3 heat pumps, 5 boilers, 5 buffers, 2 solar modules and 12 heating circuits.
+# "number_first": False keeps the legacy entity names ("Boiler ...") for the first instance.
+MODULE_TEMPLATES: Dict[str, Dict[str, Any]] = {
+    "heat_pump": {"base": 1000, "max": 3, "label": "Heat Pump {n}", "sensors": HEAT_PUMP_SENSORS},
+    "boiler": {"base": 2000, "max": 5, "label": "Boiler {n}", "number_first": False, "sensors": BOILER_SENSORS},
+    "buffer": {"base": 3000, "max": 5, "label": "Buffer {n}", "number_first": False, "sensors": BUFFER_SENSORS},
+    "solar": {"base": 4000, "max": 2, "label": "Solar {n}", "number_first": False, "sensors": SOLAR_SENSORS},
+    "heating_circuit": {"base": 5000, "max": 12, "label": "Heating Circuit {n}", "sensors": HEATING_CIRCUIT_SENSORS},
+}
+
+# what the integration polled before module discovery existed
+DEFAULT_MODULES: Dict[str, List[int]] = {
+    "heat_pump": [1], "boiler": [1], "buffer": [1], "solar": [], "heating_circuit": [1, 2, 3],
+}
+
+
+def module_base(kind: str, n: int) -> int:
+    return MODULE_TEMPLATES[kind]["base"] + (n - 1) * MODULE_STRIDE
+
+
+def module_prefix(kind: str, n: int) -> str:
+    tmpl = MODULE_TEMPLATES[kind]
+    if n == 1 and not tmpl.get("number_first", True):
+        return tmpl["label"].replace(" {n}", "")
+    return tmpl["label"].format(n=n)
+
+
+def module_sensors(kind: str, n: int) -> List[Dict[str, Any]]:
+    base = module_base(kind, n)
+    prefix = module_prefix(kind, n)
+    specs = []
+    for tmpl in MODULE_TEMPLATES[kind]["sensors"]:
+        spec = dict(tmpl)
+        reg = tmpl["register"]
+        spec["register"] = [base + r for r in reg] if isinstance(reg, list) else base + reg
+        spec["name"] = f"{prefix} {tmpl['name']}"
+        spec["module"] = (kind, n)
+        specs.append(spec)
+    return specs
+
+
+def build_sensors(modules: Optional[Dict[str, Iterable[int]]] = None) -> List[Dict[str, Any]]:
+    """General sensors plus the sensors of every listed module instance."""
+    specs = [dict(s) for s in GENERAL_SENSORS]
+    for kind, numbers in (DEFAULT_MODULES if modules is None else modules).items():
+        if kind not in MODULE_TEMPLATES:
+            continue
+        for n in sorted(numbers):
+            specs.extend(module_sensors(kind, n))
+    return specs
+
+
+def excluded_modules(data: Dict[str, Any]) -> List[Tuple[str, int]]:
+    """Modules the user ruled out in the config flow."""
+    excluded = []
+    if not data.get("has_heat_circuit_2", True):
+        excluded.append(("heating_circuit", 2))
+    if not data.get("has_heat_circuit_3", True):
+        excluded.append(("heating_circuit", 3))
+    return excluded
+
+
+def default_modules(data: Dict[str, Any]) -> Dict[str, List[int]]:
+    excluded = excluded_modules(data)
+    return {kind: [n for n in numbers if (kind, n) not in excluded] for kind, numbers in DEFAULT_MODULES.items()}
+
+
+def entry_modules(data: Dict[str, Any]) -> Dict[str, List[int]]:
+    """Probed modules if discovery has run for the entry, else the defaults."""
+    return data.get("modules") or default_modules(data)
+
+
+def probe_candidates(data: Dict[str, Any]) -> Dict[int, Tuple[str, int]]:
+    """Base register (the module's error number) -> module, for every module that may exist."""
+    excluded = excluded_modules(data)
+    return {
+        module_base(kind, n): (kind, n)
+        for kind, tmpl in MODULE_TEMPLATES.items()
+        for n in range(1, tmpl["max"] + 1)
+        if (kind, n) not in excluded
+    }
+
+
+def modules_from_probe(candidates: Dict[int, Tuple[str, int]], present: Iterable[int]) -> Dict[str, List[int]]:
+    modules: Dict[str, List[int]] = {kind: [] for kind in MODULE_TEMPLATES}
+    for reg in sorted(present):
+        kind, n = candidates[reg]
+        modules[kind].append(n)
+    return modules
+
+
+SENSORS: List[Dict[str, Any]] = build_sensors()
@@ -0,0 +1,143 @@
+"""Request and refresh statistics for one unit (exposed via diagnostics).
+
+Everything here is plain counters and fixed-bucket histograms, cheap enough
+to update on every Modbus request.
+"""
+from __future__ import annotations
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+
+from pymodbus.exceptions import ConnectionException, ModbusIOException
+
+# upper bucket bounds in milliseconds; the last bucket takes everything above
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+ERROR_TIMEOUT = "timeout"
+ERROR_CONNECTION = "connection"
+ERROR_OTHER = "error"
+
+
+def error_kind(err: BaseException) -> str:
+    """Timeout (no answer), lost/refused connection, or anything else (e.g. a Modbus exception response)."""
+    if isinstance(err, (asyncio.TimeoutError, TimeoutError, ModbusIOException)):
+        return ERROR_TIMEOUT
+    if isinstance(err, (ConnectionException, ConnectionError)):
+        return ERROR_CONNECTION
+    return ERROR_OTHER
+
+
+class Histogram:
+    """Latency histogram with fixed millisecond buckets."""
+
+    __slots__ = ("buckets", "count", "total", "max", "last")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def add(self, seconds: float) -> None:
+        ms = seconds * 1000
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.last = ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile, capped at the largest value seen."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                bound = LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else self.max
+                return round(min(bound, self.max), 2)
+        return round(self.max, 2)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": None if self.mean is None else round(self.mean, 2),
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": round(self.max, 2),
+            "last_ms": round(self.last, 2),
+            "buckets_ms": {
+                (f"<={bound:g}" if i < len(LATENCY_BUCKETS_MS) else f">{LATENCY_BUCKETS_MS[-1]:g}"): n
+                for i, (bound, n) in enumerate(zip(LATENCY_BUCKETS_MS + (None,), self.buckets)) if n
+            },
+        }
+
+
+class BlockStats:
+    """Latency and failures of one register range."""
+
+    __slots__ = ("latency", "errors", "last_error")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.errors: Dict[str, int] = {}
+        self.last_error: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"latency": self.latency.as_dict(), "errors": dict(self.errors), "last_error": self.last_error}
+
+
+class ReadStats:
+    """Everything measured for one unit: requests, per-block latency, waits and refreshes."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors: Dict[str, int] = {ERROR_TIMEOUT: 0, ERROR_CONNECTION: 0, ERROR_OTHER: 0}
+        self.blocks: Dict[str, BlockStats] = {}
+        self.request_latency = Histogram()
+        self.queue_wait = Histogram()      # gateway priority queue
+        self.executor_wait = Histogram()   # sync transport: submitted -> running in a worker thread
+        self.refresh = Histogram()
+        self.refresh_requests: List[int] = [0, 0]  # requests of the last refresh / of the running one
+        self.failed_sensors = 0
+
+    def record_request(self, label: str, seconds: float, err: Optional[BaseException] = None) -> None:
+        self.requests += 1
+        self.refresh_requests[1] += 1
+        block = self.blocks.get(label)
+        if block is None:
+            block = self.blocks[label] = BlockStats()
+        block.latency.add(seconds)
+        self.request_latency.add(seconds)
+        if err is not None:
+            kind = error_kind(err)
+            self.errors[kind] += 1
+            block.errors[kind] = block.errors.get(kind, 0) + 1
+            block.last_error = f"{type(err).__name__}: {err}"
+
+    def record_refresh(self, seconds: float, failed_sensors: int) -> None:
+        self.refresh.add(seconds)
+        self.refresh_requests = [self.refresh_requests[1], 0]
+        self.failed_sensors = failed_sensors
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": dict(self.errors),
+            "requests_last_refresh": self.refresh_requests[0],
+            "failed_sensors_last_refresh": self.failed_sensors,
+            "refresh": self.refresh.as_dict(),
+            "request_latency": self.request_latency.as_dict(),
+            "queue_wait": self.queue_wait.as_dict(),
+            "executor_wait": self.executor_wait.as_dict(),
+            # "start+count" for reads, "write start+count" for writes
+            "blocks": {label: block.as_dict() for label, block in sorted(
+                self.blocks.items(), key=lambda item: (" " in item[0], int(item[0].split()[-1].split("+")[0])))},
+        }
@@ -0,0 +1,19 @@
+"""Load the integration's modules by path.
+
+Importing the package runs its __init__, which needs Home Assistant; the
+modules under test are plain Python, so the tests import them from a bare
+`lambda_core` package pointing at the integration directory (as
+tools/benchmark_refresh.py does). Tests that do need Home Assistant skip
+without it.
+"""
+import os
+import sys
+import types
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                           "custom_components", "lambda_heatpump_test")
+
+if "lambda_core" not in sys.modules:
+    package = types.ModuleType("lambda_core")
+    package.__path__ = [PACKAGE_DIR]
+    sys.modules["lambda_core"] = package
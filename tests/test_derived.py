@@ -0,0 +1,95 @@
+import json
+import time
+
+from lambda_core.derived import MAX_RUNTIME_GAP, DerivedMetrics
+
+HP = "Heat Pump 1"
+# 15 January, inside the heating season that started on 1 September
+JANUARY = time.mktime((2026, 1, 15, 12, 0, 0, 0, 0, -1))
+
+
+def counters(electric, thermal):
+    return {f"{HP} Compressor Power Consumption Accumulated": electric,
+            f"{HP} Compressor Thermal Energy Output Accumulated": thermal}
+
+
+def hydraulics(flow, t_flow, t_return):
+    return {f"{HP} Volume Flow Heat Sink": flow, f"{HP} Flow Line Temperature": t_flow,
+            f"{HP} Return Line Temperature": t_return}
+
+
+def test_specs_per_heat_pump():
+    names = [spec["name"] for spec in DerivedMetrics([2, 1]).specs]
+    assert names[:7] == [f"{HP} Thermal Power", f"{HP} COP 1h", f"{HP} COP 24h", f"{HP} COP Season",
+                         f"{HP} Compressor Runtime", f"{HP} Compressor Starts", "Heat Pump 2 Thermal Power"]
+
+
+def test_thermal_power_from_raw_words():
+    metrics = DerivedMetrics([1])
+    # 35.00 / 30.04 °C: the rounded values (35.0 / 30.0) would give 5815 W
+    assert metrics.update({}, hydraulics(1000, 3500, 3004), JANUARY)[f"{HP} Thermal Power"] == 5768
+    assert metrics.update({}, hydraulics(800, -120, -70), JANUARY)[f"{HP} Thermal Power"] == -465
+    assert metrics.update({}, hydraulics(-5, 3500, 3000), JANUARY)[f"{HP} Thermal Power"] == 0
+    assert f"{HP} Thermal Power" not in metrics.update({}, hydraulics(1000, None, 3000), JANUARY)
+
+
+def test_cop_windows():
+    metrics = DerivedMetrics([1])
+    out = metrics.update(counters(1000, 3000), {}, JANUARY)
+    assert out[f"{HP} COP 1h"] is None  # no energy used yet
+    electric, thermal = 1000, 3000
+    for k in range(1, 25):
+        # COP 3 in the first hour, 5 in the second
+        electric, thermal = electric + 100, thermal + (300 if k <= 12 else 500)
+        out = metrics.update(counters(electric, thermal), {}, JANUARY + 300 * k)
+    assert out[f"{HP} COP 1h"] == 5.0
+    assert out[f"{HP} COP 24h"] == 4.0
+    assert out[f"{HP} COP Season"] == 4.0
+
+
+def test_counter_reset_starts_the_windows_over():
+    metrics = DerivedMetrics([1])
+    metrics.update(counters(1000, 3000), {}, JANUARY)
+    metrics.update(counters(1100, 3400), {}, JANUARY + 300)
+    out = metrics.update(counters(50, 100), {}, JANUARY + 600)
+    assert out[f"{HP} COP 1h"] is None
+    assert out[f"{HP} COP Season"] is None
+    out = metrics.update(counters(150, 300), {}, JANUARY + 900)
+    assert out[f"{HP} COP 1h"] == 2.0
+
+
+def test_runtime_and_starts():
+    metrics = DerivedMetrics([1])
+    state = f"{HP} State"
+    for now, value in [(0, 0), (10, 7), (100, 7), (370, 6), (400, 0), (500, 0), (600, 5),
+                       (600 + MAX_RUNTIME_GAP + 1, 5), (1300, 10)]:
+        out = metrics.update({}, {state: value}, JANUARY + now)
+    hp = metrics.heat_pumps[0]
+    # 10..400 running, 600..1201 a gap too long to count, then 1201..1300
+    assert hp.runtime_s == 390 + 99
+    assert out[f"{HP} Compressor Starts"] == 2
+    assert out[f"{HP} Compressor Runtime"] == round(489 / 3600, 2)
+
+
+def test_restore_continues_where_it_stopped():
+    metrics = DerivedMetrics([1])
+    state = f"{HP} State"
+    for k in range(13):
+        metrics.update(counters(1000 + 100 * k, 3000 + 400 * k), {state: 7}, JANUARY + 300 * k)
+    stored = json.loads(json.dumps(metrics.as_dict()))  # as written by the Store
+
+    restored = DerivedMetrics([1])
+    restored.restore(stored)
+    now = JANUARY + 300 * 13
+    expected = metrics.update(counters(2300, 8200), {state: 0}, now)
+    assert restored.update(counters(2300, 8200), {state: 0}, now) == expected
+    assert expected[f"{HP} COP 1h"] == 4.0
+    assert expected[f"{HP} Compressor Runtime"] == 1.08
+    assert expected[f"{HP} Compressor Starts"] == 0
+
+
+def test_restore_ignores_unknown_heat_pumps():
+    metrics = DerivedMetrics([1])
+    metrics.restore({"2": {"cycles": 5}})
+    metrics.restore(None)
+    assert metrics.heat_pumps[0].cycles == 0
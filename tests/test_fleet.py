@@ -0,0 +1,101 @@
+import asyncio
+import types
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from lambda_core import fleet as fleet_module  # noqa: E402
+from lambda_core.fleet import ISSUE_OVERLOADED, OVERLOAD_STREAK, FleetScheduler  # noqa: E402
+
+TICK = 2.0
+
+
+@pytest.fixture
+def issues(monkeypatch):
+    created = {}
+    monkeypatch.setattr(fleet_module.ir, "async_create_issue",
+                        lambda hass, domain, issue_id, **kw: created.__setitem__(issue_id, kw))
+    monkeypatch.setattr(fleet_module.ir, "async_delete_issue",
+                        lambda hass, domain, issue_id: created.pop(issue_id, None))
+    return created
+
+
+@pytest.fixture
+def fleet(issues):
+    hass = types.SimpleNamespace(loop=types.SimpleNamespace(time=lambda: 0.0))
+    return FleetScheduler(hass, max_transactions=2)
+
+
+def test_phases_are_spread_evenly(fleet):
+    for entry_id in "abcdef":
+        fleet.next_slot(entry_id, entry_id.upper(), TICK, 0.0)
+    assert [fleet.phase(e) for e in "abcdef"] == [k / 6 for k in range(6)]
+    slots = sorted(fleet.next_slot(e, e.upper(), TICK, 10.0) for e in "abcdef")
+    assert slots[0] >= 10.0 + TICK / 2
+    assert [round(b - a, 6) for a, b in zip(slots, slots[1:])] == [round(TICK / 6, 6)] * 5
+
+
+def test_slots_stay_on_the_grid(fleet):
+    fleet.next_slot("a", "A", TICK, 0.0)
+    slot = fleet.next_slot("b", "B", TICK, 0.0)
+    assert slot % TICK == pytest.approx(TICK / 2)
+    # a refresh that ends late skips a slot instead of running right away
+    assert fleet.refresh_done("b", "B", TICK, slot, slot + 1.5) == slot + 2 * TICK
+    assert fleet.refresh_done("b", "B", TICK, slot + 2 * TICK, slot + 2 * TICK + 0.2) == slot + 3 * TICK
+
+
+def test_removing_an_entry_respreads(fleet):
+    for entry_id in "abc":
+        fleet.next_slot(entry_id, entry_id, TICK, 0.0)
+    fleet.remove("b")
+    fleet.remove("b")
+    assert [fleet.phase(e) for e in "ac"] == [0.0, 0.5]
+    assert set(fleet.as_dict()["entries"]) == {"a", "c"}
+
+
+def test_late_refreshes_raise_and_clear_the_issue(fleet, issues):
+    slot = fleet.next_slot("a", "Keller", TICK, 0.0)
+    for _ in range(OVERLOAD_STREAK - 1):
+        slot = fleet.refresh_done("a", "Keller", TICK, slot, slot + TICK)
+    assert not fleet.overloaded and not issues
+    slot = fleet.refresh_done("a", "Keller", TICK, slot, slot + TICK)
+    assert fleet.overloaded
+    assert issues[ISSUE_OVERLOADED]["translation_placeholders"] == {"entries": "Keller"}
+    entry = fleet.as_dict()["entries"]["a"]
+    assert (entry["refreshes"], entry["late"], entry["late_in_a_row"]) == (3, 3, 3)
+
+    fleet.refresh_done("a", "Keller", TICK, slot, slot + 0.1)
+    assert not fleet.overloaded and not issues
+    assert fleet.as_dict()["entries"]["a"]["late"] == 3
+
+
+def test_refresh_of_a_stale_slot_is_not_counted(fleet):
+    slot = fleet.next_slot("a", "A", TICK, 0.0)
+    fleet.next_slot("b", "B", TICK, 0.0)  # re-spread: a's slot is forgotten
+    fleet.refresh_done("a", "A", TICK, slot, slot + TICK)
+    assert fleet.as_dict()["entries"]["a"]["refreshes"] == 0
+
+
+def test_removing_the_late_entry_clears_the_issue(fleet, issues):
+    fleet.next_slot("b", "B", TICK, 0.0)
+    slot = fleet.next_slot("a", "A", TICK, 0.0)
+    for _ in range(OVERLOAD_STREAK):
+        slot = fleet.refresh_done("a", "A", TICK, slot, slot + TICK)
+    assert ISSUE_OVERLOADED in issues
+    fleet.remove("a")
+    assert not fleet.overloaded and not issues
+
+
+def test_transactions_are_capped(fleet):
+    async def run():
+        await fleet.async_acquire()
+        await fleet.async_acquire()
+        third = asyncio.ensure_future(fleet.async_acquire())
+        await asyncio.sleep(0)
+        assert not third.done() and fleet.in_flight == 2
+        fleet.release()
+        await third
+        assert fleet.in_flight == 2
+
+    asyncio.run(run())
@@ -0,0 +1,63 @@
+from lambda_core.health import BlockHealth
+from lambda_core.stats import ERROR_CONNECTION, ERROR_TIMEOUT
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def quarantine(health, clock, label="1000+24"):
+    """Fail the block until it is quarantined; returns the backoff in seconds."""
+    while health.allow(label):
+        health.failure(label, ERROR_TIMEOUT)
+    backoff = health.as_dict()[label]["backoff_s"]
+    clock.now += backoff
+    return backoff
+
+
+def test_quarantined_after_threshold_failures():
+    clock = Clock()
+    health = BlockHealth(threshold=2, backoff=30, clock=clock)
+    health.failure("0+5", ERROR_TIMEOUT)
+    assert health.allow("0+5")
+    assert health.timed_out("0+5")
+    health.failure("0+5", ERROR_TIMEOUT)
+    assert not health.allow("0+5")
+    assert health.allow("100+5")
+    clock.now += 29.9
+    assert not health.allow("0+5")
+    clock.now += 0.1
+    assert health.allow("0+5")
+
+
+def test_backoff_doubles_up_to_the_maximum():
+    clock = Clock()
+    health = BlockHealth(threshold=2, backoff=30, max_backoff=200, clock=clock)
+    assert [quarantine(health, clock) for _ in range(5)] == [30, 60, 120, 200, 200]
+
+
+def test_one_failed_retry_quarantines_again():
+    clock = Clock()
+    health = BlockHealth(threshold=3, backoff=10, clock=clock)
+    quarantine(health, clock, "a")
+    health.failure("a", ERROR_CONNECTION)
+    assert not health.allow("a")
+    assert health.kind("a") == ERROR_CONNECTION
+    assert not health.timed_out("a")
+
+
+def test_success_closes_the_circuit():
+    clock = Clock()
+    health = BlockHealth(threshold=2, backoff=30, clock=clock)
+    quarantine(health, clock, "a")
+    health.success("a")
+    assert health.kind("a") is None
+    assert health.as_dict() == {}
+    health.failure("a", ERROR_TIMEOUT)
+    assert health.allow("a")
+    health.failure("a", ERROR_TIMEOUT)
+    assert health.as_dict()["a"]["backoff_s"] == 30
@@ -0,0 +1,52 @@
+from lambda_core.history import MAX_PENDING_HOURS, PERIOD, HistoryBuffer, history_specs, statistic_id
+from lambda_core.registers import SENSORS
+
+TEMP = {"name": "Flow", "register": 1004, "scale": 0.1, "unit": "°C"}
+FLOW = {"name": "Volume", "register": 1006, "data_type": "uint16", "unit": "l/h"}
+START = 1_700_000_000 - 1_700_000_000 % PERIOD
+
+
+def test_history_specs_skip_enums_and_counters():
+    specs = history_specs(SENSORS)
+    assert specs and all(isinstance(s["register"], int) and "description_map" not in s for s in specs)
+    assert "Heat Pump 1 Flow Line Temperature" in {s["name"] for s in specs}
+    assert statistic_id("01ABC", "Heat Pump 1 Flow Line Temperature") == \
+        "lambda_heatpump_test:01abc_heat_pump_1_flow_line_temperature"
+
+
+def test_hourly_mean_min_max():
+    history = HistoryBuffer([TEMP, FLOW], tick=600)
+    for k, (temp, flow) in enumerate([(350, 40000), (-20, 1000), (None, 1000), (300, None)]):
+        history.append(START + 600 * k, {"Flow": temp, "Volume": flow})
+    assert history.pending == {}  # the hour is not complete yet
+    history.append(START + PERIOD, {"Flow": 400, "Volume": 500})
+    assert history.pending == {
+        "Flow": [(START, round((35.0 - 2.0 + 30.0) / 3, 4), -2.0, 35.0)],
+        "Volume": [(START, 14000.0, 1000.0, 40000.0)],
+    }
+    history.append(START + 3 * PERIOD, {})  # an hour without refreshes leaves no row
+    assert history.pending["Flow"][1:] == [(START + PERIOD, 40.0, 40.0, 40.0)]
+
+
+def test_pending_hours_are_capped():
+    history = HistoryBuffer([TEMP], tick=PERIOD, span=PERIOD)
+    for k in range(MAX_PENDING_HOURS + 6):
+        history.append(START + PERIOD * k, {"Flow": k})
+    rows = history.pending["Flow"]
+    assert len(rows) == MAX_PENDING_HOURS
+    assert rows[-1][0] == START + PERIOD * (MAX_PENDING_HOURS + 4)
+
+
+def test_ring_wraps_and_keeps_the_newest_rows():
+    history = HistoryBuffer([dict(TEMP, scale=0.5), FLOW], tick=10, span=50)
+    assert history.capacity == 5
+    for k in range(12):
+        history.append(START + 10 * k, {"Flow": k, "Volume": 65535 - k} if k != 9 else {"Volume": 0})
+    assert history.size == 5
+    assert history.series("Flow") == [(START + 70, 3.5), (START + 80, 4.0), (START + 90, None),
+                                      (START + 100, 5.0), (START + 110, 5.5)]
+    assert history.series("Volume", last=2) == [(START + 100, 65525), (START + 110, 65524)]
+    dump = history.as_dict(last=1)
+    assert dump["rows"] == 5 and dump["span_s"] == 40
+    assert dump["bytes"] == 5 * 8 + 2 * 5 * 2
+    assert dump["last"]["Flow"] == [(START + 110, 5.5)]
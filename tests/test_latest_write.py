@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from lambda_core.latest_write import LatestWrite
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class Device:
+    """Records what gets sent; each send waits until the test lets it through."""
+
+    def __init__(self):
+        self.sent = []
+        self.gate = asyncio.Event()
+        self.fail = False
+
+    async def send(self, values):
+        self.sent.append(values)
+        await self.gate.wait()
+        if self.fail:
+            raise ConnectionError("gone")
+        return [100 + v for v in values]
+
+
+def test_rapid_writes_send_only_the_latest():
+    async def run():
+        device = Device()
+        writer = LatestWrite(device.send)
+        first = asyncio.ensure_future(writer.async_write([1]))
+        await settle()
+        assert device.sent == [[1]]
+        # queued while [1] is on the wire: only the newest one goes out after it
+        superseded = [asyncio.ensure_future(writer.async_write([v])) for v in (2, 3, 4)]
+        await settle()
+        device.gate.set()
+        assert await first == [101]
+        assert await asyncio.gather(*superseded) == [[104]] * 3
+        assert device.sent == [[1], [4]]
+
+    asyncio.run(run())
+
+
+def test_writes_after_the_drain_are_sent_again():
+    async def run():
+        device = Device()
+        device.gate.set()
+        writer = LatestWrite(device.send)
+        assert await writer.async_write([5]) == [105]
+        assert await writer.async_write([5]) == [105]
+        assert device.sent == [[5], [5]]
+
+    asyncio.run(run())
+
+
+def test_a_failed_write_fails_its_callers_only():
+    async def run():
+        device = Device()
+        writer = LatestWrite(device.send)
+        device.fail = True
+        failing = asyncio.ensure_future(writer.async_write([1]))
+        await settle()
+        device.gate.set()
+        with pytest.raises(ConnectionError):
+            await failing
+        device.fail = False
+        assert await writer.async_write([2]) == [102]
+
+    asyncio.run(run())
+
+
+def test_a_cancelled_caller_does_not_cancel_the_write():
+    async def run():
+        device = Device()
+        writer = LatestWrite(device.send)
+        impatient = asyncio.ensure_future(writer.async_write([1]))
+        await settle()
+        patient = asyncio.ensure_future(writer.async_write([2]))
+        await settle()
+        impatient.cancel()
+        device.gate.set()
+        assert await patient == [102]
+        assert device.sent == [[1], [2]]
+
+    asyncio.run(run())
@@ -0,0 +1,54 @@
+import pytest
+
+from lambda_core.read_plan import MODBUS_MAX_BLOCK, ReadBlock, build_read_plan, spec_registers
+from lambda_core.registers import SENSORS, build_sensors
+
+
+def covered(plan):
+    return sorted(spec["name"] for block in plan for spec in block.specs)
+
+
+def test_default_map_is_read_in_13_blocks():
+    plan = build_read_plan(SENSORS)
+    assert len(SENSORS) == 71
+    assert [(b.start, b.count) for b in plan] == [
+        (0, 5), (100, 5), (1000, 24), (2000, 4), (2050, 1), (3000, 4), (3050, 1),
+        (5000, 7), (5050, 3), (5100, 7), (5150, 3), (5200, 7), (5250, 3),
+    ]
+    assert covered(plan) == sorted(s["name"] for s in SENSORS)
+
+
+@pytest.mark.parametrize("max_gap, max_block, blocks", [(0, 64, 14), (4, 2, 42), (125, 125, 6)])
+def test_limits_change_the_block_count(max_gap, max_block, blocks):
+    plan = build_read_plan(SENSORS, max_gap, max_block)
+    assert len(plan) == blocks
+    assert covered(plan) == sorted(s["name"] for s in SENSORS)
+
+
+@pytest.mark.parametrize("max_gap, max_block", [(0, 2), (4, 64), (10, 16), (200, 500)])
+def test_blocks_respect_gap_and_size(max_gap, max_block):
+    specs = build_sensors({"heat_pump": [1, 2, 3], "boiler": [1, 2], "solar": [1], "heating_circuit": [1, 4]})
+    plan = build_read_plan(specs, max_gap, max_block)
+    limit = max(2, min(max_block, MODBUS_MAX_BLOCK))
+    for block in plan:
+        assert block.count <= limit
+        ranges = sorted(spec_registers(s) for s in block.specs)
+        assert ranges[0][0] == block.start
+        assert max(start + count for start, count in ranges) == block.end
+        for (start, count), (following, _) in zip(ranges, ranges[1:]):
+            assert following - (start + count) <= max_gap
+    for block, following in zip(plan, plan[1:]):
+        assert block.end <= following.start
+
+
+def test_32_bit_sensor_stays_in_one_block():
+    specs = [{"name": "a", "register": 10}, {"name": "b", "register": [12, 11]}, {"name": "c", "register": 13}]
+    plan = build_read_plan(specs, max_gap=0, max_block=2)
+    assert [(b.start, b.count) for b in plan] == [(10, 1), (11, 2), (13, 1)]
+
+
+def test_split_reads_each_sensor_alone():
+    block = build_read_plan([{"name": "a", "register": 1}, {"name": "b", "register": [2, 3]}])[0]
+    assert [(s.start, s.count) for s in block.split()] == [(1, 1), (2, 2)]
+    assert block.split() is block.split()
+    assert isinstance(block.split()[0], ReadBlock) and block.split()[0].decoder is not None
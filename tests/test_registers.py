@@ -0,0 +1,64 @@
+from lambda_core.registers import (
+    GENERAL_SENSORS, MODULE_TEMPLATES, SENSORS, build_sensors, default_modules, entry_modules, module_sensors,
+    modules_from_probe, probe_candidates,
+)
+
+
+def names(specs):
+    return [s["name"] for s in specs]
+
+
+def test_probe_candidates_cover_every_module():
+    candidates = probe_candidates({})
+    assert len(candidates) == sum(t["max"] for t in MODULE_TEMPLATES.values()) == 27
+    assert candidates[1000] == ("heat_pump", 1)
+    assert candidates[1200] == ("heat_pump", 3)
+    assert candidates[2400] == ("boiler", 5)
+    assert candidates[4100] == ("solar", 2)
+    assert candidates[6100] == ("heating_circuit", 12)
+
+
+def test_probe_candidates_honour_deselected_heating_circuits():
+    candidates = probe_candidates({"has_heat_circuit_2": False, "has_heat_circuit_3": True})
+    assert 5100 not in candidates and 5200 in candidates
+    candidates = probe_candidates({"has_heat_circuit_2": False, "has_heat_circuit_3": False})
+    assert len(candidates) == 25 and not {5100, 5200} & set(candidates)
+    assert default_modules({"has_heat_circuit_3": False})["heating_circuit"] == [1, 2]
+
+
+def test_modules_from_probe():
+    candidates = probe_candidates({})
+    modules = modules_from_probe(candidates, [5000, 1000, 2000, 1100, 4000, 6100])
+    assert modules == {"heat_pump": [1, 2], "boiler": [1], "buffer": [], "solar": [1], "heating_circuit": [1, 12]}
+    assert modules_from_probe(candidates, []) == {kind: [] for kind in MODULE_TEMPLATES}
+
+
+def test_entry_modules_prefers_the_cached_probe():
+    assert entry_modules({"modules": {"heat_pump": [2]}}) == {"heat_pump": [2]}
+    assert entry_modules({"has_heat_circuit_2": False}) == default_modules({"has_heat_circuit_2": False})
+
+
+def test_first_boiler_buffer_and_solar_keep_legacy_names():
+    specs = build_sensors({"heat_pump": [1], "boiler": [1, 2], "buffer": [1], "solar": [1, 2]})
+    assert names(specs[:len(GENERAL_SENSORS)]) == names(GENERAL_SENSORS)
+    modules = set(names(specs[len(GENERAL_SENSORS):]))
+    assert {"Heat Pump 1 Flow Line Temperature", "Boiler Error Number", "Boiler 2 Error Number",
+            "Buffer Set Temperature", "Solar Actual Collector Temperature",
+            "Solar 2 Actual Collector Temperature"} <= modules
+    assert not {"Boiler 1 Error Number", "Buffer 1 Set Temperature", "Solar 1 Error Number"} & modules
+
+
+def test_module_registers_are_offset_from_the_base():
+    specs = {s["name"]: s for s in module_sensors("heat_pump", 2)}
+    assert specs["Heat Pump 2 Error State"]["register"] == 1100
+    assert specs["Heat Pump 2 Compressor Power Consumption Accumulated"]["register"] == [1120, 1121]
+    assert specs["Heat Pump 2 Error State"]["module"] == ("heat_pump", 2)
+    # the templates themselves stay untouched
+    assert MODULE_TEMPLATES["heat_pump"]["sensors"][0]["register"] == 0
+
+
+def test_build_sensors_lists_modules_in_order_and_skips_unknown_kinds():
+    specs = build_sensors({"heating_circuit": [3, 1], "pool": [1]})
+    circuits = [s["module"] for s in specs if "module" in s]
+    assert circuits == [("heating_circuit", 1)] * 10 + [("heating_circuit", 3)] * 10
+    assert len(SENSORS) == len(build_sensors(None)) == 71
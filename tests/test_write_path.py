@@ -0,0 +1,157 @@
+import asyncio
+import tempfile
+import types
+from collections import defaultdict
+
+import pytest
+
+pytest.importorskip("homeassistant")
+pytest.importorskip("pymodbus")
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from lambda_core.coordinator import LambdaCoordinator  # noqa: E402
+from lambda_core.lambda_heatpump_test_api import (  # noqa: E402
+    AsyncModbusClientManager, AsyncPlanReader, ModbusClientManager,
+)
+from lambda_core.registers import GENERAL_SENSORS, NUMBERS  # noqa: E402
+
+SETPOINT = NUMBERS[0]
+
+
+class Response:
+    def __init__(self, registers=None, exception_code=None):
+        self.registers = registers or []
+        self.exception_code = exception_code
+
+    def isError(self):
+        return self.exception_code is not None
+
+
+class Device:
+    """Sync pymodbus client stand-in; `fc23` False answers FC23 with exception code 1 (illegal function)."""
+
+    connected = True
+
+    def __init__(self, fc23):
+        self.fc23 = fc23
+        self.memory = defaultdict(int)
+        self.calls = []
+
+    def _read(self, address, count):
+        return Response([self.memory[r] for r in range(address, address + count)])
+
+    def readwrite_registers(self, read_address=0, read_count=0, write_address=0, values=None, slave=1):
+        self.calls.append("fc23")
+        if not self.fc23:
+            return Response(exception_code=1)
+        self.memory.update(enumerate(values, write_address))
+        return self._read(read_address, read_count)
+
+    def write_registers(self, address, values, slave=1):
+        self.calls.append("fc16")
+        self.memory.update(enumerate(values, address))
+        return Response()
+
+    def read_holding_registers(self, address, count=1, slave=1):
+        self.calls.append("fc03")
+        return self._read(address, count)
+
+
+class AsyncDevice(Device):
+    async def readwrite_registers(self, read_address=0, read_count=0, write_address=0, values=None, slave=1):
+        return Device.readwrite_registers(self, read_address, read_count, write_address, values, slave)
+
+    async def write_registers(self, address, values, slave=1):
+        return Device.write_registers(self, address, values, slave)
+
+    async def read_holding_registers(self, address, count=1, slave=1):
+        return Device.read_holding_registers(self, address, count, slave)
+
+
+def write(manager, value):
+    return manager.write_read_registers(104, [value], 100, 5)
+
+
+def test_fc23_writes_and_reads_back_in_one_transaction():
+    manager = ModbusClientManager("192.0.2.1")
+    manager.client = device = Device(fc23=True)
+    assert write(manager, 1500) == [0, 0, 0, 0, 1500]
+    assert write(manager, 1600) == [0, 0, 0, 0, 1600]
+    assert device.calls == ["fc23", "fc23"]
+
+
+def test_illegal_function_switches_to_fc16_for_good():
+    manager = ModbusClientManager("192.0.2.1")
+    manager.client = device = Device(fc23=False)
+    assert write(manager, 1500) == [0, 0, 0, 0, 1500]
+    assert device.calls == ["fc23", "fc16", "fc03"]
+    assert write(manager, 1600) == [0, 0, 0, 0, 1600]
+    assert device.calls[3:] == ["fc16", "fc03"]
+
+
+def test_illegal_function_switches_to_fc16_async():
+    async def run():
+        manager = AsyncModbusClientManager("192.0.2.1")
+        manager.client = device = AsyncDevice(fc23=False)
+        assert await manager.async_write_read_registers(104, [7], 100, 5) == [0, 0, 0, 0, 7]
+        assert await manager.async_write_read_registers(104, [8], 100, 5) == [0, 0, 0, 0, 8]
+        assert device.calls == ["fc23", "fc16", "fc03", "fc16", "fc03"]
+
+    asyncio.run(run())
+
+
+class SlowUnit(AsyncPlanReader):
+    """Reads wait for `gate`, so a write can land while a refresh is on the wire."""
+
+    def __init__(self):
+        self.memory = defaultdict(int)
+        self.gate = asyncio.Event()
+
+    async def async_read_u16_block(self, start_register, count):
+        values = [self.memory[r] for r in range(start_register, start_register + count)]
+        await self.gate.wait()
+        return values
+
+    async def async_write_read_registers(self, address, values, read_start, read_count):
+        self.memory.update(enumerate(values, address))
+        return [self.memory[r] for r in range(read_start, read_start + read_count)]
+
+
+def test_readback_during_a_refresh_is_not_overwritten_by_it():
+    name = SETPOINT["name"]
+
+    async def run():
+        hass = HomeAssistant(tempfile.mkdtemp())
+        entry = types.SimpleNamespace(entry_id="e1", title="Lambda", data={}, options={})
+        unit = SlowUnit()
+        unit.memory[104] = 500
+        coordinator = LambdaCoordinator(hass, entry, unit, [dict(s) for s in GENERAL_SENSORS])
+        try:
+            unit.gate.set()
+            await coordinator.async_refresh()
+            assert coordinator.data[name] == 500
+
+            unit.gate.clear()
+            coordinator._next_due = dict.fromkeys(coordinator._next_due, 0.0)
+            refresh = asyncio.ensure_future(coordinator.async_refresh())
+            await asyncio.sleep(0.01)  # the refresh has read 500 and waits for the answer
+            assert await coordinator.async_write_number(SETPOINT, 1500) == {
+                "E-Manager Error Number": 0, "E-Manager Operating State": "Off", "E-Manager Actual Power": 0,
+                "E-Manager Actual Power Consumption": 0, name: 1500,
+            }
+            unit.gate.set()
+            await refresh
+            assert coordinator.last_update_success
+            assert coordinator.data[name] == 1500
+            assert coordinator.raw[name] == 1500
+
+            # a refresh started after the write is newer than it and counts again
+            unit.memory[104] = 900
+            coordinator._next_due = dict.fromkeys(coordinator._next_due, 0.0)
+            await coordinator.async_refresh()
+            assert coordinator.data[name] == 900
+        finally:
+            await hass.async_stop(force=True)
+
+    asyncio.run(run())
@@ -0,0 +1,327 @@
+"""Refresh benchmark for the Lambda Heatpump Test read path.
+
+Starts tools/lambda_simulator.py in a subprocess (so its CPU time does not
+count) and refreshes N simulated units against it:
+
+    python tools/benchmark_refresh.py --mode legacy --units 4 --latency 5
+    python tools/benchmark_refresh.py --mode coordinator --transport async --units 4 --latency 5
+
+Modes:
+  legacy       one read_holding_registers + executor job per sensor (the original refresh)
+  sync         the whole read plan in one executor job per refresh
+  async        AsyncModbusClientManager.async_read_plan
+  coordinator  LambdaCoordinator refreshes through the shared gateway (needs Home Assistant)
+
+Reports round-trips per refresh, p50/p99 refresh wall time, CPU time per
+refresh and the poll rate the setup sustains back-to-back. The simulator
+runs frozen with a fixed seed, so the values of the first refresh are
+compared one by one with its register memory, decoded independently of
+decoder.py. legacy and sync only need pymodbus (the HA-free modules are
+loaded by path), async and coordinator import the integration and need
+Home Assistant.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import importlib
+import inspect
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from lambda_simulator import SimulatedUnit, add_simulator_arguments, parse_modules, registers  # noqa: E402
+
+PACKAGE_DIR = os.path.join(ROOT, "custom_components", "lambda_heatpump_test")
+
+
+def load_read_plan():
+    """Import read_plan.py (and decoder.py) by path; importing the package would pull in Home Assistant."""
+    package = types.ModuleType("lambda_core")
+    package.__path__ = [PACKAGE_DIR]
+    sys.modules.setdefault("lambda_core", package)
+    return importlib.import_module("lambda_core.read_plan")
+
+
+read_plan_module = load_read_plan()
+ReadBlock = read_plan_module.ReadBlock
+build_read_plan = read_plan_module.build_read_plan
+
+
+class RoundTrips:
+    """Counts requests by wrapping a manager's _read_holding."""
+
+    def __init__(self):
+        self.count = 0
+
+    def attach(self, manager) -> None:
+        inner = manager._read_holding
+
+        def counted(*args, **kwargs):
+            self.count += 1
+            return inner(*args, **kwargs)
+
+        manager._read_holding = counted
+
+
+def start_simulator(args: argparse.Namespace) -> Tuple[subprocess.Popen, int]:
+    cmd = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "lambda_simulator.py"),
+           "--port", "0", "--units", str(args.units), "--word-order", args.word_order,
+           "--latency", str(args.latency), "--jitter", str(args.jitter), "--drop", str(args.drop),
+           "--missing", args.missing]
+    if args.modules is not None:
+        cmd += ["--modules", *args.modules]
+    cmd += ["--seed", str(args.seed), "--frozen"]
+    if not args.fc23:
+        cmd += ["--no-fc23"]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline().strip()
+    if not line.startswith("listening"):
+        proc.kill()
+        raise SystemExit(f"simulator did not start: {line!r}")
+    return proc, int(line.rsplit(":", 1)[1])
+
+
+def expected_values(specs: List[Dict[str, Any]], unit: SimulatedUnit, word_order: str) -> Dict[str, Any]:
+    """Values straight from the simulator's register memory, decoded per sensor without decoder.py."""
+    expected = {}
+    for spec in specs:
+        reg, dtype = spec["register"], (spec.get("data_type") or "int16").lower()
+        if isinstance(reg, list):
+            words = [unit.memory[r] for r in sorted(reg)]
+            if reg[0] > reg[1]:
+                words.reverse()
+            high, low = (words[1], words[0]) if word_order == "little" else (words[0], words[1])
+            value = high * 0x10000 + low
+            if dtype in ("int32", "s32") and value >= 0x80000000:
+                value -= 0x100000000
+        else:
+            value = unit.memory[reg]
+            if dtype != "uint16" and value >= 0x8000:
+                value -= 0x10000
+        value = value * spec.get("scale", 1) if spec.get("scale") not in (None, 1) else value
+        if spec.get("precision", 0) is not None:
+            value = round(value, int(spec.get("precision", 0)))
+        enum = spec.get("description_map")
+        if isinstance(enum, list) and 0 <= int(value) < len(enum):
+            value = enum[int(value)]
+        expected[spec["name"]] = value
+    return expected
+
+
+def check_decoding(data: Dict[str, Any], expected: Optional[Dict[str, Any]]) -> List[str]:
+    """Sensors whose decoded value differs from the simulator's (only None checks without `expected`)."""
+    bad = []
+    for name, value in sorted(data.items()):
+        if value is None:
+            bad.append(f"{name}: no value")
+        elif expected is not None and value != expected.get(name):
+            bad.append(f"{name}: {value!r}, simulator has {expected.get(name)!r}")
+    return bad
+
+
+class SyncReader:
+    """Blocking pymodbus client for one unit (legacy and sync modes)."""
+
+    def __init__(self, port: int, unit_id: int, timeout: float, counter: RoundTrips):
+        from pymodbus.client import ModbusTcpClient
+
+        self.client = ModbusTcpClient("127.0.0.1", port=port, timeout=timeout, retries=0)
+        self.unit_id = unit_id
+        self.counter = counter
+        params = inspect.signature(self.client.read_holding_registers).parameters
+        self.unit_kw = next((name for name in ("device_id", "slave", "unit") if name in params), "unit")
+
+    def read(self, start: int, count: int) -> List[int]:
+        self.counter.count += 1
+        rr = self.client.read_holding_registers(start, count=count, **{self.unit_kw: self.unit_id})
+        if rr.isError():
+            raise IOError(f"reading {start}+{count}: {rr}")
+        return rr.registers
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def read_plan(read: Callable[[int, int], List[int]], plan: List[ReadBlock]) -> Dict[str, Any]:
+    """Blocking refresh of a plan; blocks the device rejects are read sensor by sensor."""
+    data: Dict[str, Any] = {}
+    for block in plan:
+        try:
+            block.decode_into(read(block.start, block.count), data)
+            continue
+        except Exception:
+            if len(block.specs) == 1:
+                data.setdefault(block.specs[0]["name"], None)
+                continue
+        for single in block.split():
+            try:
+                single.decode_into(read(single.start, single.count), data)
+            except Exception:
+                data.setdefault(single.specs[0]["name"], None)
+    return data
+
+
+async def make_refreshers(args, port: int, specs, counter: RoundTrips) -> Tuple[List[Callable], Callable]:
+    """One refresh coroutine function per unit, plus a cleanup coroutine function."""
+    loop = asyncio.get_running_loop()
+    word_order = args.word_order
+    plan = build_read_plan(specs, args.max_gap, args.max_block, word_order)
+    executor = ThreadPoolExecutor(max_workers=args.units)
+    refreshers: List[Callable] = []
+    closers: List[Callable] = []
+
+    if args.mode in ("legacy", "sync"):
+        for unit_id in range(1, args.units + 1):
+            reader = SyncReader(port, unit_id, args.timeout, counter)
+            closers.append(reader.close)
+            if args.mode == "sync":
+                refreshers.append(lambda r=reader: loop.run_in_executor(executor, read_plan, r.read, plan))
+                continue
+            singles = [block for b in plan for block in b.split()]
+
+            async def legacy(r=reader, singles=singles):
+                data: Dict[str, Any] = {}
+                for single in singles:
+                    try:
+                        single.decode_into(await loop.run_in_executor(executor, r.read, single.start,
+                                                                      single.count), data)
+                    except Exception:
+                        data.setdefault(single.specs[0]["name"], None)
+                return data
+            refreshers.append(legacy)
+
+    elif args.mode == "async":
+        from custom_components.lambda_heatpump_test.lambda_heatpump_test_api import AsyncModbusClientManager
+
+        for unit_id in range(1, args.units + 1):
+            manager = AsyncModbusClientManager("127.0.0.1", word_order, unit_id, args.timeout,
+                                               args.max_inflight, port)
+            counter.attach(manager)
+            closers.append(manager.close)
+            refreshers.append(lambda m=manager: m.async_read_plan(plan))
+
+    else:
+        from homeassistant.core import HomeAssistant
+        from custom_components.lambda_heatpump_test.coordinator import LambdaCoordinator
+        from custom_components.lambda_heatpump_test.gateway import GatewayClient, async_get_gateway
+
+        hass = HomeAssistant(tempfile.mkdtemp())
+        coordinators = []
+        for unit_id in range(1, args.units + 1):
+            entry = types.SimpleNamespace(
+                entry_id=f"bench{unit_id}", title=f"bench {unit_id}", options={},
+                data={"ip_address": "127.0.0.1", "port": port, "unit_id": unit_id, "word_order": word_order,
+                      "transport": args.transport, "timeout": args.timeout, "max_inflight": args.max_inflight,
+                      "max_register_gap": args.max_gap, "max_block_size": args.max_block},
+            )
+            gateway = async_get_gateway(hass, entry)
+            if unit_id == 1:
+                counter.attach(gateway.manager)
+            coordinator = LambdaCoordinator(hass, entry, GatewayClient(gateway, unit_id), specs)
+            coordinators.append(coordinator)
+
+            async def refresh(c=coordinator):
+                c._next_due = dict.fromkeys(c._next_due, 0.0)  # read every tier each round
+                return await c._async_update_data()
+            refreshers.append(refresh)
+
+        async def cleanup_hass():
+            for gateway in list(hass.data.get("lambda_heatpump_test", {}).get("gateways", {}).values()):
+                gateway.close()
+            await hass.async_stop(force=True)
+        closers.append(cleanup_hass)
+
+    async def cleanup():
+        for close in closers:
+            result = close()
+            if asyncio.iscoroutine(result):
+                await result
+        executor.shutdown(wait=False)
+
+    return refreshers, cleanup
+
+
+async def run(args: argparse.Namespace, port: int) -> None:
+    modules = registers.DEFAULT_MODULES if args.modules is None else parse_modules(args.modules)
+    specs = registers.build_sensors(modules)
+    counter = RoundTrips()
+    refreshers, cleanup = await make_refreshers(args, port, specs, counter)
+    try:
+        first = await refreshers[0]()
+        # unit 1 of an own simulator: frozen and seeded, so its memory can be rebuilt here
+        expected = None if args.target is not None else expected_values(
+            specs, SimulatedUnit(modules, args.word_order, args.seed + 1), args.word_order)
+        bad = check_decoding(first, expected)
+        counter.count = 0
+
+        walls: List[float] = []
+        cpu0, t0 = time.process_time(), time.perf_counter()
+        for _ in range(args.refreshes):
+            async def timed(refresh):
+                start = time.perf_counter()
+                await refresh()
+                walls.append(time.perf_counter() - start)
+            await asyncio.gather(*(timed(r) for r in refreshers))
+        elapsed, cpu = time.perf_counter() - t0, time.process_time() - cpu0
+    finally:
+        await cleanup()
+
+    total = args.refreshes * args.units
+    walls.sort()
+    p99 = walls[min(len(walls) - 1, int(len(walls) * 0.99))]
+    print(f"mode={args.mode}{'/' + args.transport if args.mode == 'coordinator' else ''} "
+          f"units={args.units} sensors/unit={len(specs)} refreshes={total}")
+    print(f"  round-trips/refresh   {counter.count / total:8.1f}")
+    print(f"  refresh wall p50      {statistics.median(walls) * 1000:8.1f} ms")
+    print(f"  refresh wall p99      {p99 * 1000:8.1f} ms")
+    print(f"  CPU/refresh           {cpu / total * 1000:8.2f} ms")
+    print(f"  max poll rate         {total / elapsed:8.1f} refreshes/s fleet, "
+          f"{args.refreshes / elapsed:.2f}/s per unit")
+    if bad:
+        print(f"  DECODING PROBLEMS ({len(bad)}):")
+        for line in bad[:20]:
+            print(f"    {line}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mode", choices=("legacy", "sync", "async", "coordinator"), default="coordinator")
+    parser.add_argument("--transport", choices=("sync", "async"), default="sync",
+                        help="gateway transport in coordinator mode")
+    parser.add_argument("--refreshes", type=int, default=50, help="refreshes per unit")
+    parser.add_argument("--target", default=None, metavar="PORT",
+                        help="use an already running simulator on 127.0.0.1:PORT")
+    parser.add_argument("--timeout", type=float, default=3)
+    parser.add_argument("--max-inflight", type=int, default=1)
+    parser.add_argument("--max-gap", type=int, default=4)
+    parser.add_argument("--max-block", type=int, default=64)
+    add_simulator_arguments(parser)
+    args = parser.parse_args()
+    if args.seed is None:
+        args.seed = 0
+
+    proc = None
+    if args.target is None:
+        proc, port = start_simulator(args)
+    else:
+        port = int(args.target)
+    try:
+        asyncio.run(run(args, port))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
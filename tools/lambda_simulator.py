@@ -0,0 +1,310 @@
+"""Local Modbus TCP stand-in for a Lambda heat pump controller.
+
+The register map is generated from the integration's register templates
+(custom_components/lambda_heatpump_test/registers.py), so every sensor the
+integration polls has a plausible value. Only the standard library is needed.
+
+    python tools/lambda_simulator.py --port 5020 --units 2 --word-order little \
+        --modules heat_pump=1,2 boiler=1 heating_circuit=1,2 --latency 20 --jitter 5
+
+Supported function codes: 3 (read holding), 6/16 (write), 23 (read/write multiple,
+disable with `--no-fc23`).
+Registers of modules that are not installed answer with exception 2
+(illegal data address), like the real controller; `--missing timeout` makes
+them not answer at all instead.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import importlib.util
+import logging
+import math
+import os
+import random
+import struct
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_LOGGER = logging.getLogger("lambda_simulator")
+
+_REGISTERS_PY = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir,
+    "custom_components", "lambda_heatpump_test", "registers.py",
+)
+
+
+def load_registers():
+    """Import registers.py by path; importing the package would pull in Home Assistant."""
+    spec = importlib.util.spec_from_file_location("lambda_registers", _REGISTERS_PY)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+registers = load_registers()
+
+ILLEGAL_FUNCTION = 1
+ILLEGAL_DATA_ADDRESS = 2
+
+
+class SimulatedUnit:
+    """Register memory of one unit ID, with values that drift over time."""
+
+    def __init__(self, modules: Dict[str, List[int]], word_order: str = "big", seed: Optional[int] = None,
+                 frozen: bool = False):
+        self.word_order = word_order
+        self.frozen = frozen  # keep the seeded values, e.g. to check decoded values exactly
+        self.rng = random.Random(seed)
+        self.specs = registers.build_sensors(modules)
+        self.memory: Dict[int, int] = {}
+        # general registers (index 0/1) plus a 100-register window per installed module
+        self.ranges: List[Tuple[int, int]] = [(0, 100), (100, 200)]
+        for kind, numbers in modules.items():
+            for n in numbers:
+                base = registers.module_base(kind, n)
+                self.ranges.append((base, base + registers.MODULE_STRIDE))
+        self._physical: Dict[str, float] = {}
+        self._counters: List[Tuple[dict, float]] = []
+        self._last_tick = time.monotonic()
+        for spec in self.specs:
+            self._init_spec(spec)
+
+    def present(self, start: int, count: int) -> bool:
+        return any(lo <= start and start + count <= hi for lo, hi in self.ranges)
+
+    def _init_spec(self, spec: dict) -> None:
+        reg = spec["register"]
+        if isinstance(reg, list):
+            # start above 65535 so both words matter
+            value = self.rng.randint(200_000, 5_000_000)
+            self._counters.append((spec, float(value)))
+            self._write_u32(reg, value)
+            return
+        self._physical[spec["name"]] = self._initial_value(spec)
+        self._write_physical(spec)
+
+    def _initial_value(self, spec: dict) -> float:
+        name = spec["name"]
+        if spec.get("description_map"):
+            return self.rng.randrange(min(len(spec["description_map"]), 8))
+        if "Error" in name:
+            return 0
+        if spec.get("device_class") == "temperature":
+            # outdoor air and the energy source go below zero in winter (and exercise the int16 sign)
+            if "Ambient" in name or "Energy Source" in name:
+                return self.rng.uniform(-15, 10)
+            return self.rng.uniform(20, 55)
+        unit = spec.get("unit")
+        if unit == "W":
+            return self.rng.uniform(0, 3000)
+        if unit == "%":
+            return self.rng.uniform(0, 100)
+        if unit == "kW":
+            return self.rng.uniform(0, 12)
+        if unit in ("l/h", "l/min"):
+            return self.rng.uniform(0, 1500 if unit == "l/h" else 60)
+        if name.endswith("COP"):
+            return self.rng.uniform(2, 5)
+        return 0
+
+    def _write_physical(self, spec: dict) -> None:
+        scale = spec.get("scale") or 1
+        raw = int(round(self._physical[spec["name"]] / scale))
+        self.memory[spec["register"]] = raw & 0xFFFF
+
+    def _write_u32(self, reg: List[int], value: int) -> None:
+        high, low = (value >> 16) & 0xFFFF, value & 0xFFFF
+        first, second = (low, high) if self.word_order == "little" else (high, low)
+        self.memory[reg[0]], self.memory[reg[1]] = first, second
+
+    def tick(self) -> None:
+        if self.frozen:
+            return
+        now = time.monotonic()
+        dt, self._last_tick = now - self._last_tick, now
+        if dt <= 0:
+            return
+        for spec in self.specs:
+            if spec.get("state_class") != "measurement" or isinstance(spec["register"], list):
+                continue
+            value = self._physical[spec["name"]] + self.rng.gauss(0, 0.05) * math.sqrt(dt)
+            self._physical[spec["name"]] = value
+            self._write_physical(spec)
+        for i, (spec, value) in enumerate(self._counters):
+            value += self.rng.uniform(0, 3000) * dt / 3600  # Wh at up to 3 kW
+            self._counters[i] = (spec, value)
+            self._write_u32(spec["register"], int(value))
+
+    def read(self, start: int, count: int) -> List[int]:
+        self.tick()
+        return [self.memory.get(start + i, 0) for i in range(count)]
+
+    def write(self, start: int, values: Iterable[int]) -> None:
+        for i, value in enumerate(values):
+            self.memory[start + i] = value & 0xFFFF
+
+
+class LambdaSimulator:
+    """asyncio Modbus TCP server with configurable latency, jitter and drops."""
+
+    def __init__(self, units: Dict[int, SimulatedUnit], latency: float = 0.0, jitter: float = 0.0,
+                 drop: float = 0.0, missing: str = "exception", seed: Optional[int] = None, fc23: bool = True):
+        self.units = units
+        self.fc23 = fc23
+        self.latency = latency
+        self.jitter = jitter
+        self.drop = drop
+        self.missing = missing
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.dropped = 0
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 5020) -> int:
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                header = await reader.readexactly(7)
+                tid, pid, length, unit_id = struct.unpack(">HHHB", header)
+                pdu = await reader.readexactly(length - 1)
+                self.requests += 1
+                response = self._respond(unit_id, pdu)
+                if response is None or self.rng.random() < self.drop:
+                    self.dropped += 1
+                    continue
+                delay = self.latency + self.rng.uniform(-self.jitter, self.jitter)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                writer.write(struct.pack(">HHHB", tid, pid, len(response) + 1, unit_id) + response)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _error(self, fc: int, code: int) -> bytes:
+        return bytes((fc | 0x80, code))
+
+    def _respond(self, unit_id: int, pdu: bytes) -> Optional[bytes]:
+        fc = pdu[0]
+        unit = self.units.get(unit_id)
+        if unit is None:
+            return None if self.missing == "timeout" else self._error(fc, 0x0B)  # gateway target failed
+        if fc == 3:
+            start, count = struct.unpack(">HH", pdu[1:5])
+            if not unit.present(start, count):
+                return None if self.missing == "timeout" else self._error(fc, ILLEGAL_DATA_ADDRESS)
+            regs = unit.read(start, count)
+            return struct.pack(f">BB{count}H", fc, 2 * count, *regs)
+        if fc == 6:
+            start, value = struct.unpack(">HH", pdu[1:5])
+            if not unit.present(start, 1):
+                return self._error(fc, ILLEGAL_DATA_ADDRESS)
+            unit.write(start, [value])
+            return pdu[:5]
+        if fc == 16:
+            start, count, nbytes = struct.unpack(">HHB", pdu[1:6])
+            if not unit.present(start, count):
+                return self._error(fc, ILLEGAL_DATA_ADDRESS)
+            unit.write(start, struct.unpack(f">{count}H", pdu[6:6 + nbytes]))
+            return pdu[:5]
+        if fc == 23 and self.fc23:
+            r_start, r_count, w_start, w_count, nbytes = struct.unpack(">HHHHB", pdu[1:10])
+            if not (unit.present(r_start, r_count) and unit.present(w_start, w_count)):
+                return self._error(fc, ILLEGAL_DATA_ADDRESS)
+            unit.write(w_start, struct.unpack(f">{w_count}H", pdu[10:10 + nbytes]))
+            regs = unit.read(r_start, r_count)
+            return struct.pack(f">BB{r_count}H", fc, 2 * r_count, *regs)
+        return self._error(fc, ILLEGAL_FUNCTION)
+
+
+def parse_modules(items: Iterable[str]) -> Dict[str, List[int]]:
+    """["heat_pump=1,2", "boiler=1"] -> {"heat_pump": [1, 2], "boiler": [1], ...}"""
+    modules = {kind: [] for kind in registers.MODULE_TEMPLATES}
+    for item in items:
+        kind, _, numbers = item.partition("=")
+        if kind not in modules:
+            raise argparse.ArgumentTypeError(f"unknown module type {kind!r}")
+        modules[kind] = [int(n) for n in numbers.split(",") if n]
+    return modules
+
+
+def build_simulator(units: int = 1, modules: Optional[Dict[str, List[int]]] = None, word_order: str = "big",
+                    latency: float = 0.0, jitter: float = 0.0, drop: float = 0.0,
+                    missing: str = "exception", seed: Optional[int] = None, fc23: bool = True,
+                    frozen: bool = False) -> LambdaSimulator:
+    modules = registers.DEFAULT_MODULES if modules is None else modules
+    sim_units = {
+        unit_id: SimulatedUnit(modules, word_order, None if seed is None else seed + unit_id, frozen)
+        for unit_id in range(1, units + 1)
+    }
+    return LambdaSimulator(sim_units, latency, jitter, drop, missing, seed, fc23)
+
+
+def add_simulator_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--units", type=int, default=1, help="simulated unit IDs 1..N")
+    parser.add_argument("--modules", nargs="*", default=None, metavar="TYPE=N,N",
+                        help="installed modules, e.g. heat_pump=1 boiler=1 heating_circuit=1,2 (default: integration defaults)")
+    parser.add_argument("--word-order", choices=("big", "little"), default="big",
+                        help="int32 word order: big = before 2025, little = from 2025")
+    parser.add_argument("--latency", type=float, default=0.0, help="response latency in ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- latency jitter in ms")
+    parser.add_argument("--drop", type=float, default=0.0, help="probability of not answering a request")
+    parser.add_argument("--missing", choices=("exception", "timeout"), default="exception",
+                        help="how absent modules answer")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--no-fc23", dest="fc23", action="store_false",
+                        help="answer read/write multiple registers (FC23) with illegal function")
+    parser.add_argument("--frozen", action="store_true",
+                        help="values do not drift (with --seed the register memory is reproducible)")
+
+
+def simulator_from_args(args: argparse.Namespace) -> LambdaSimulator:
+    return build_simulator(
+        units=args.units,
+        modules=None if args.modules is None else parse_modules(args.modules),
+        word_order=args.word_order,
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        drop=args.drop,
+        missing=args.missing,
+        seed=args.seed,
+        fc23=args.fc23,
+        frozen=args.frozen,
+    )
+
+
+async def _main(args: argparse.Namespace) -> None:
+    sim = simulator_from_args(args)
+    port = await sim.start(args.host, args.port)
+    _LOGGER.info("Lambda simulator listening on %s:%s (%d unit(s))", args.host, port, args.units)
+    print(f"listening {args.host}:{port}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await sim.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5020, help="0 picks a free port")
+    add_simulator_arguments(parser)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()